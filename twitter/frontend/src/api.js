@@ -89,10 +89,19 @@ export const authAPI = {
 
 // TWEETS
 export const tweetAPI = {
-  list: () => apiFetch("/api/tweets/"),
+  list: (cursor) =>
+    apiFetch(`/api/tweets/${cursor ? `?cursor=${encodeURIComponent(cursor)}` : ""}`),
+
+  forYou: (cursor) =>
+    apiFetch(`/api/tweets/?feed=for_you${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ""}`),
+
+  home: (cursor) =>
+    apiFetch(`/api/tweets/home/${cursor ? `?cursor=${encodeURIComponent(cursor)}` : ""}`),
 
   detail: (id) => apiFetch(`/api/tweets/${id}/`),
 
+  batch: (ids) => apiFetch(`/api/tweets/batch/?ids=${ids.join(",")}`),
+
   create: (formData) =>
     apiFetch("/api/tweets/", {
       method: "POST",
@@ -114,18 +123,48 @@ export const tweetAPI = {
     apiFetch(`/api/tweets/${id}/like/`, {
       method: "POST",
     }),
+
+  // operations: [{ tweet: id, action: "like" | "unlike" }]
+  setLikes: (operations) =>
+    apiFetch("/api/likes/batch/", {
+      method: "POST",
+      body: JSON.stringify({ operations }),
+    }),
+};
+
+// SEARCH / TRENDS
+export const searchAPI = {
+  tweets: (q, cursor) =>
+    apiFetch(`/api/search/?q=${encodeURIComponent(q)}${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ""}`),
+
+  trends: () => apiFetch("/api/trends/"),
 };
 
 // NOTIFICATIONS
 export const notifAPI = {
   list: () => apiFetch("/api/notifications/"),
 
+  unread: () => apiFetch("/api/notifications/unread/"),
+
   markRead: () =>
     apiFetch("/api/notifications/", {
       method: "POST",
     }),
 };
 
+// REAL-TIME (Server-Sent Events; EventSource resumes with Last-Event-ID)
+export const streamAPI = {
+  subscribe: (handlers) => {
+    const source = new EventSource(`${API_BASE}/api/stream/`, {
+      withCredentials: true,
+    });
+    Object.entries(handlers).forEach(([type, handler]) => {
+      source.addEventListener(type, (e) => handler(JSON.parse(e.data)));
+    });
+    return () => source.close();
+  },
+};
+
 // PROFILE
 export const profileAPI = {
   get: (username) =>
@@ -137,6 +176,16 @@ export const profileAPI = {
       body: JSON.stringify(data),
     }),
 
-  tweets: (username) =>
-    apiFetch(`/api/profile/${username}/tweets/`),
+  follow: (username) =>
+    apiFetch(`/api/profile/${username}/follow/`, {
+      method: "POST",
+    }),
+
+  unfollow: (username) =>
+    apiFetch(`/api/profile/${username}/follow/`, {
+      method: "DELETE",
+    }),
+
+  tweets: (username, cursor) =>
+    apiFetch(`/api/profile/${username}/tweets/${cursor ? `?cursor=${encodeURIComponent(cursor)}` : ""}`),
 };
\ No newline at end of file
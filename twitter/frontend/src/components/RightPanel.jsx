@@ -2,16 +2,20 @@ import { useState, useEffect } from 'react';
 import { Search, Heart, MessageCircle, UserPlus, Sparkles } from 'lucide-react';
 import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../App';
-import { tweetAPI } from '../api';
+import { tweetAPI, searchAPI } from '../api';
 
 export default function RightPanel() {
     const { user } = useAuth();
     const navigate = useNavigate();
     const [recentTweets, setRecentTweets] = useState([]);
+    const [trends, setTrends] = useState([]);
 
     useEffect(() => {
         tweetAPI.list()
-            .then(data => setRecentTweets((data || []).slice(0, 5)))
+            .then(data => setRecentTweets((data?.results || []).slice(0, 5)))
+            .catch(() => { });
+        searchAPI.trends()
+            .then(data => setTrends(data?.trends || []))
             .catch(() => { });
     }, []);
 
@@ -112,11 +116,14 @@ export default function RightPanel() {
             {/* Quick Links */}
             <div className="rp-section">
                 <div className="rp-section-title">Explore</div>
-                {[
+                {(trends.length > 0 ? trends.map(t => ({
+                    tag: `#${t.tag}`,
+                    desc: `${t.count} ${t.count === 1 ? 'tweet' : 'tweets'}`,
+                })) : [
                     { tag: '#Django', desc: 'Backend framework' },
                     { tag: '#React', desc: 'Frontend library' },
                     { tag: '#Python', desc: 'Programming language' },
-                ].map((item, i) => (
+                ]).map((item, i) => (
                     <div key={i} className="rp-item" style={{ flexDirection: 'column', alignItems: 'flex-start', gap: 2 }}>
                         <span className="rp-trending-name">{item.tag}</span>
                         <span className="rp-trending-count">{item.desc}</span>
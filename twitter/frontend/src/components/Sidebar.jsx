@@ -3,7 +3,7 @@ import { Home, Bell, User, LogOut, LogIn, Settings } from 'lucide-react';
 import { useAuth } from '../App';
 import { authAPI } from '../api';
 import { useState, useEffect } from 'react';
-import { notifAPI } from '../api';
+import { notifAPI, streamAPI } from '../api';
 
 export default function Sidebar() {
     const { user, setUser } = useAuth();
@@ -12,7 +12,16 @@ export default function Sidebar() {
 
     useEffect(() => {
         if (user) {
-            notifAPI.list().then(d => setUnread(d.unread_count)).catch(() => { });
+            notifAPI.unread().then(d => setUnread(d.unread_count)).catch(() => { });
+            return streamAPI.subscribe({
+                notifications: (d) => {
+                    if (d.unread_count === null) {
+                        notifAPI.unread().then(r => setUnread(r.unread_count)).catch(() => { });
+                    } else {
+                        setUnread(d.unread_count);
+                    }
+                },
+            });
         }
     }, [user]);
 
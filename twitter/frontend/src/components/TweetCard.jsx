@@ -94,6 +94,9 @@ export default function TweetCard({ tweet, onDelete }) {
                         <img src={tweet.photo_url} alt="" loading="lazy" />
                     </div>
                 )}
+                {tweet.photo_status === 'processing' && (
+                    <div className="tweet-image-processing">Processing photo…</div>
+                )}
 
                 {/* Actions bar */}
                 <div className="tweet-actions-bar">
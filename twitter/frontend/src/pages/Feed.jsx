@@ -1,5 +1,5 @@
 import { useState, useEffect, useCallback } from 'react';
-import { tweetAPI } from '../api';
+import { tweetAPI, streamAPI } from '../api';
 import { useAuth } from '../App';
 import TweetCard from '../components/TweetCard';
 import ComposeTweet from '../components/ComposeTweet';
@@ -9,11 +9,15 @@ export default function Feed() {
     const [tweets, setTweets] = useState([]);
     const [loading, setLoading] = useState(true);
     const [deleteId, setDeleteId] = useState(null);
+    const [nextCursor, setNextCursor] = useState(null);
+    const [newCount, setNewCount] = useState(0);
 
     const fetchTweets = useCallback(async () => {
         try {
             const data = await tweetAPI.list();
-            setTweets(data);
+            setTweets(data.results);
+            setNextCursor(data.next);
+            setNewCount(0);
         } catch (err) {
             console.error(err);
         } finally {
@@ -21,6 +25,24 @@ export default function Feed() {
         }
     }, []);
 
+    // New tweets pushed from the server
+    useEffect(() => streamAPI.subscribe({
+        tweet: (d) => {
+            if (d.user !== user?.id) setNewCount(c => c + 1);
+        },
+    }), [user]);
+
+    const loadMore = async () => {
+        if (!nextCursor) return;
+        try {
+            const data = await tweetAPI.list(nextCursor);
+            setTweets(prev => [...prev, ...data.results]);
+            setNextCursor(data.next);
+        } catch (err) {
+            console.error(err);
+        }
+    };
+
     useEffect(() => {
         fetchTweets();
     }, [fetchTweets]);
@@ -61,6 +83,14 @@ export default function Feed() {
                 <ComposeTweet onTweetCreated={fetchTweets} />
             )}
 
+            {newCount > 0 && (
+                <div className="load-more">
+                    <button className="load-more-btn" onClick={fetchTweets}>
+                        Show {newCount} new {newCount === 1 ? 'tweet' : 'tweets'}
+                    </button>
+                </div>
+            )}
+
             {/* Feed */}
             {loading ? (
                 <div className="loading-spinner">
@@ -72,13 +102,20 @@ export default function Feed() {
                     <p>No tweets yet. Be the first to tweet something!</p>
                 </div>
             ) : (
-                tweets.map(tweet => (
-                    <TweetCard
-                        key={tweet.id}
-                        tweet={tweet}
-                        onDelete={handleDelete}
-                    />
-                ))
+                <>
+                    {tweets.map(tweet => (
+                        <TweetCard
+                            key={tweet.id}
+                            tweet={tweet}
+                            onDelete={handleDelete}
+                        />
+                    ))}
+                    {nextCursor && (
+                        <div className="load-more">
+                            <button className="load-more-btn" onClick={loadMore}>Show more</button>
+                        </div>
+                    )}
+                </>
             )}
 
             {/* Delete confirm modal */}
@@ -40,6 +40,7 @@ export default function Notifications() {
             case 'like': return 'liked your tweet';
             case 'reply': return 'replied to your tweet';
             case 'follow': return 'followed you';
+            case 'mention': return 'mentioned you';
             default: return verb;
         }
     };
@@ -82,6 +83,9 @@ export default function Notifications() {
                                 >
                                     {n.actor?.display_name || n.actor?.username}
                                 </strong>
+                                {n.actor_count > 1 && (
+                                    <span> and {n.actor_count - 1} {n.actor_count === 2 ? 'other' : 'others'}</span>
+                                )}
                             </div>
                             <div className="notif-text">
                                 {getVerb(n.verb)}
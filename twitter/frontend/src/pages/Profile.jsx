@@ -16,6 +16,7 @@ export default function Profile() {
     const [editing, setEditing] = useState(false);
     const [editData, setEditData] = useState({});
     const [deleteId, setDeleteId] = useState(null);
+    const [nextCursor, setNextCursor] = useState(null);
 
     const isOwnProfile = user && user.username === username;
 
@@ -26,7 +27,8 @@ export default function Profile() {
                 profileAPI.tweets(username),
             ]);
             setProfile(p);
-            setTweets(t);
+            setTweets(t.results);
+            setNextCursor(t.next);
             setEditData({ display_name: p.display_name || '', bio: p.bio || '', location: p.location || '', website: p.website || '' });
         } catch (err) {
             console.error(err);
@@ -40,6 +42,17 @@ export default function Profile() {
         fetchData();
     }, [username]);
 
+    const loadMore = async () => {
+        if (!nextCursor) return;
+        try {
+            const data = await profileAPI.tweets(username, nextCursor);
+            setTweets(prev => [...prev, ...data.results]);
+            setNextCursor(data.next);
+        } catch (err) {
+            console.error(err);
+        }
+    };
+
     const handleSaveProfile = async () => {
         try {
             const data = await profileAPI.update(username, editData);
@@ -218,9 +231,16 @@ export default function Profile() {
                         <p>When {isOwnProfile ? 'you' : `@${profile.username}`} posts, they'll show up here.</p>
                     </div>
                 ) : (
-                    tweets.map(t => (
-                        <TweetCard key={t.id} tweet={t} onDelete={handleDelete} />
-                    ))
+                    <>
+                        {tweets.map(t => (
+                            <TweetCard key={t.id} tweet={t} onDelete={handleDelete} />
+                        ))}
+                        {nextCursor && (
+                            <div className="load-more">
+                                <button className="load-more-btn" onClick={loadMore}>Show more</button>
+                            </div>
+                        )}
+                    </>
                 )}
             </div>
 
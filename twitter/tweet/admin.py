@@ -1,7 +1,8 @@
 from django.contrib import admin
-from .models import Tweet, UserProfile, Like, Notification
+from .models import Tweet, UserProfile, Like, Notification, Follow
 
 admin.site.register(Tweet)
 admin.site.register(UserProfile)
 admin.site.register(Like)
-admin.site.register(Notification)
\ No newline at end of file
+admin.site.register(Notification)
+admin.site.register(Follow)
\ No newline at end of file
@@ -3,3 +3,11 @@ from django.apps import AppConfig
 
 class TweetConfig(AppConfig):
     name = 'tweet'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from . import dbhealth, metrics, signals  # noqa: F401
+
+        # Every connection reports to the current request's metrics, if sampled.
+        connection_created.connect(metrics.install, dispatch_uid='tweet.metrics.install')
+        connection_created.connect(dbhealth.connection_opened, dispatch_uid='tweet.dbhealth.opened')
@@ -1,3 +1,7 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from rest_framework.authentication import SessionAuthentication
 
 
@@ -5,3 +9,39 @@ class CsrfExemptSessionAuthentication(SessionAuthentication):
     """Session auth that skips CSRF checks — safe for CORS-protected API."""
     def enforce_csrf(self, request):
         return  # skip CSRF
+
+
+def user_cache_key(user_id):
+    return f'auth-user:v2:{user_id}'  # v2: (user without password, session hash)
+
+
+def invalidate_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ``ModelBackend`` whose per-request ``get_user()`` is served from the cache
+    for ``AUTH_USER_CACHE_TIMEOUT`` seconds, with the profile attached, so
+    ``request.user`` and ``request.user.profile`` cost no queries. Saving a
+    user or profile drops the entry (see ``tweet.signals``).
+
+    The password hash is left out of the entry. Sessions are checked against
+    its HMAC (``get_session_auth_hash()``), which is cached in its place.
+    """
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        cached = cache.get(key)
+        if cached is None:
+            user = User.objects.select_related('profile').filter(pk=user_id).first()
+            if user is None:
+                return None
+            session_hash = user.get_session_auth_hash()
+            # Deferred again: anything that still needs it loads it from the database.
+            del user.__dict__['password']
+            cached = (user, session_hash)
+            cache.set(key, cached, getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60))
+        user, session_hash = cached
+        user.get_session_auth_hash = lambda: session_hash
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,45 @@
+"""
+Conditional GET helpers.
+
+Views build an ETag from values they already hold before serializing
+(``updated_at``, counters, the viewer's flags) and return 304 early when the
+client's ``If-None-Match`` matches. Counters such as ``like_count`` change
+without touching ``updated_at``, so no ``Last-Modified`` is sent; the ETag
+is the only validator.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+
+from .identity import load_identities
+
+
+def make_etag(*parts):
+    return '"%s"' % hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def tweets_etag(tweets, viewer_state, *extra):
+    """ETag for a page of tweets as ``serialize_tweets`` would render it."""
+    authors = load_identities(tweet.user_id for tweet in tweets)
+    return make_etag(
+        extra,
+        [(tweet.id, tweet.updated_at, tweet.like_count) for tweet in tweets],
+        sorted(viewer_state.liked_ids),
+        sorted(authors.items()),
+    )
+
+
+def not_modified(request, etag, per_viewer=False):
+    """Return a 304 response if ``etag`` satisfies the request, else None."""
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        patch_validators(response, etag, per_viewer)
+    return response
+
+
+def patch_validators(response, etag, per_viewer=False):
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    if per_viewer:
+        patch_vary_headers(response, ['Cookie'])
+    return response
@@ -0,0 +1,82 @@
+"""
+Database connection health and pool metrics.
+
+``report()`` pings each configured database and describes how it is
+connected: persistent connections (``CONN_MAX_AGE``) or the psycopg pool
+Django opens when ``OPTIONS['pool']`` is set. Pool stats come from
+``psycopg_pool`` (checkout wait, connections in use, opened and lost); for
+every mode this process also counts the connections it has opened, which
+is the churn that persistent connections and pooling are meant to remove.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.db import connections
+
+_opened = Counter()
+_opened_lock = threading.Lock()
+
+
+def connection_opened(sender, connection, **kwargs):
+    """``connection_created`` receiver."""
+    with _opened_lock:
+        _opened[connection.alias] += 1
+
+
+def opened_count(alias='default'):
+    with _opened_lock:
+        return _opened[alias]
+
+
+def pool_stats(alias='default'):
+    connection = connections[alias]
+    if connection.vendor != 'postgresql' or not connection.settings_dict['OPTIONS'].get('pool'):
+        return None
+    stats = connection.pool.get_stats()
+    requests = stats.get('requests_num', 0)
+    return {
+        'size': stats.get('pool_size', 0),
+        'available': stats.get('pool_available', 0),
+        'in_use': stats.get('pool_size', 0) - stats.get('pool_available', 0),
+        'max_size': stats.get('pool_max', 0),
+        'waiting': stats.get('requests_waiting', 0),
+        'checkouts': requests,
+        'checkout_wait_ms_total': stats.get('requests_wait_ms', 0),
+        'checkout_wait_ms_avg': stats.get('requests_wait_ms', 0) / requests if requests else 0.0,
+        'checkout_errors': stats.get('requests_errors', 0),
+        'connections_opened': stats.get('connections_num', 0),
+        'connections_lost': stats.get('connections_lost', 0),
+    }
+
+
+def ping(alias='default'):
+    """Run ``SELECT 1``; return ``(ok, latency_ms, error)``."""
+    started = time.perf_counter()
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    except Exception as exc:
+        return False, (time.perf_counter() - started) * 1000, str(exc)
+    return True, (time.perf_counter() - started) * 1000, None
+
+
+def report(details=False):
+    databases = {}
+    for alias in connections:
+        ok, latency, error = ping(alias)
+        entry = {'ok': ok, 'latency_ms': round(latency, 2)}
+        if error:
+            entry['error'] = error if details else 'unavailable'
+        if details:
+            settings_dict = connections[alias].settings_dict
+            entry.update({
+                'vendor': connections[alias].vendor,
+                'conn_max_age': settings_dict['CONN_MAX_AGE'],
+                'conn_health_checks': settings_dict['CONN_HEALTH_CHECKS'],
+                'connections_opened_by_process': opened_count(alias),
+                'pool': pool_stats(alias) if ok else None,
+            })
+        databases[alias] = entry
+    return databases
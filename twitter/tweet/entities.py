@@ -0,0 +1,138 @@
+"""
+Hashtags, mentions and trending tags.
+
+Tweet text is parsed once, on write, by ``sync_entities()`` (scheduled as a
+background task). It keeps the ``TweetHashtag`` and ``Mention`` link tables
+in step with the current text and notifies newly mentioned users. Each tag
+counts once in the ``TrendBucket`` of the tweet's creation time: adding it
+bumps that bucket and removing it (by an edit, or by ``purge_tweet`` once
+the tweet is deleted) takes it back. ``trending()`` sums the last
+``TRENDS_WINDOW_BUCKETS`` buckets and never reads ``Tweet``.
+"""
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Hashtag, Mention, TrendBucket, Tweet, TweetHashtag
+from .notifications import notify
+from .tasks import enqueue
+
+# Tags longer than Hashtag.name allows are skipped, not truncated.
+HASHTAG_RE = re.compile(r'(?<!\w)#(\w{1,50})\b')
+MENTION_RE = re.compile(r'(?<!\w)@(\w{1,150})')
+
+
+def bucket_seconds():
+    return getattr(settings, 'TRENDS_BUCKET_SECONDS', 3600)
+
+
+def window_buckets():
+    return getattr(settings, 'TRENDS_WINDOW_BUCKETS', 24)
+
+
+def parse_hashtags(text):
+    return {tag.lower() for tag in HASHTAG_RE.findall(text)}
+
+
+def parse_mentions(text):
+    return set(MENTION_RE.findall(text))
+
+
+def bucket_start(moment):
+    size = bucket_seconds()
+    return moment - timedelta(seconds=moment.timestamp() % size)
+
+
+def schedule_sync(tweet_id):
+    enqueue(sync_entities, tweet_id)
+
+
+def sync_entities(tweet_id):
+    tweet = (Tweet.objects.for_id(tweet_id).filter(pk=tweet_id)
+             .only('id', 'user_id', 'text', 'created_at').first())
+    if tweet is None:
+        return  # links went with the tweet
+    with transaction.atomic():
+        added_tags, removed_tags = _sync_hashtags(tweet)
+        added_mentions = _sync_mentions(tweet)
+        if added_tags:
+            _count_trends(added_tags, tweet.created_at)
+        if removed_tags:
+            uncount_trends(removed_tags, tweet.created_at)
+    for user_id in added_mentions:
+        notify('mention', user_id, tweet.user_id, tweet.id)
+
+
+def _sync_hashtags(tweet):
+    """Bring the tweet's links in line with its text; return (added, removed) hashtag ids."""
+    names = parse_hashtags(tweet.text)
+    current = dict(tweet.hashtag_links.values_list('hashtag__name', 'hashtag_id'))
+    stale = [pk for name, pk in current.items() if name not in names]
+    if stale:
+        tweet.hashtag_links.filter(hashtag_id__in=stale).delete()
+
+    new_names = names - current.keys()
+    if not new_names:
+        return [], stale
+    Hashtag.objects.bulk_create([Hashtag(name=name) for name in new_names], ignore_conflicts=True)
+    hashtag_ids = list(Hashtag.objects.filter(name__in=new_names).values_list('id', flat=True))
+    TweetHashtag.objects.bulk_create(
+        [TweetHashtag(tweet=tweet, hashtag_id=pk, created_at=tweet.created_at) for pk in hashtag_ids],
+        ignore_conflicts=True,
+    )
+    return hashtag_ids, stale
+
+
+def _sync_mentions(tweet):
+    usernames = parse_mentions(tweet.text)
+    user_ids = set(User.objects.filter(username__in=usernames).values_list('id', flat=True))
+    user_ids.discard(tweet.user_id)
+    current = set(tweet.mentions.values_list('user_id', flat=True))
+    if current - user_ids:
+        tweet.mentions.filter(user_id__in=current - user_ids).delete()
+
+    added = user_ids - current
+    Mention.objects.bulk_create(
+        [Mention(tweet=tweet, user_id=pk, created_at=tweet.created_at) for pk in added],
+        ignore_conflicts=True,
+    )
+    return added
+
+
+def _count_trends(hashtag_ids, created_at):
+    start = bucket_start(created_at)
+    existing = set(TrendBucket.objects.filter(bucket_start=start, hashtag_id__in=hashtag_ids)
+                   .values_list('hashtag_id', flat=True))
+    TrendBucket.objects.bulk_create(
+        [TrendBucket(hashtag_id=pk, bucket_start=start, count=0) for pk in hashtag_ids if pk not in existing],
+        ignore_conflicts=True,
+    )
+    TrendBucket.objects.filter(bucket_start=start, hashtag_id__in=hashtag_ids).update(count=F('count') + 1)
+
+
+def uncount_trends(hashtag_ids, created_at):
+    """Take back the counts of tags dropped from a tweet created at ``created_at``."""
+    TrendBucket.objects.filter(bucket_start=bucket_start(created_at), hashtag_id__in=hashtag_ids,
+                               count__gt=0).update(count=F('count') - 1)
+
+
+def trending(limit=10):
+    """Top hashtags over the trailing window, cached for one minute."""
+    key = f'trends:{limit}:{bucket_start(timezone.now()).timestamp()}'
+    trends = cache.get(key)
+    if trends is None:
+        since = bucket_start(timezone.now()) - timedelta(seconds=bucket_seconds() * (window_buckets() - 1))
+        rows = (TrendBucket.objects.filter(bucket_start__gte=since)
+                .values('hashtag__name')
+                .annotate(total=Sum('count'))
+                .filter(total__gt=0)  # tags whose tweets were all edited or deleted away
+                .order_by('-total', 'hashtag__name')[:limit])
+        trends = [{'tag': row['hashtag__name'], 'count': row['total']} for row in rows]
+        cache.set(key, trends, 60)
+    return trends
@@ -6,9 +6,14 @@ from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
 
 class TweetForm(forms.ModelForm):
+    # Not a model field here: the view hands the file to tweet.media.stage_photo.
+    photo = forms.ImageField(required=False, widget=forms.ClearableFileInput(attrs={
+        'class': 'form-control'
+    }))
+
     class Meta:
         model = Tweet
-        fields = ['text', 'photo']
+        fields = ['text']
 
         widgets = {
             'text': forms.Textarea(attrs={
@@ -16,10 +21,6 @@ class TweetForm(forms.ModelForm):
                 'rows': 5,
                 'placeholder': 'Write your tweet...'
             }),
-
-            'photo': forms.ClearableFileInput(attrs={
-                'class': 'form-control'
-            })
         }
 
 class Userregistrationform(UserCreationForm):
@@ -0,0 +1,94 @@
+"""
+Author identity hydration.
+
+``UserMiniSerializer`` output (id, username, display_name, avatar_url) for
+every user on a page is loaded with one joined query and kept in a bounded
+per-process LRU with a short TTL. Saving a profile invalidates the local
+entry (``tweet.signals``); the TTL bounds staleness in other worker processes.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+
+
+class LRUCache:
+    """Thread-safe LRU map whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is None:
+                    continue
+                expires, value = entry
+                if expires < now:
+                    del self._data[key]
+                    continue
+                self._data.move_to_end(key)
+                found[key] = value
+        return found
+
+    def set_many(self, mapping):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key, value in mapping.items():
+                self._data[key] = (expires, value)
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_identities = LRUCache(
+    maxsize=getattr(settings, 'IDENTITY_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'IDENTITY_CACHE_TTL', 60),
+)
+
+
+def load_identities(user_ids):
+    """Return ``{user_id: identity dict}`` for ``user_ids``, querying only misses."""
+    user_ids = set(user_ids)
+    identities = _identities.get_many(user_ids)
+    missing = user_ids - identities.keys()
+    if missing:
+        rows = User.objects.filter(id__in=missing).values_list(
+            'id', 'username', 'profile__display_name', 'profile__avatar_url',
+        )
+        fresh = {
+            pk: {
+                'id': pk,
+                'username': username,
+                'display_name': display_name or username,
+                'avatar_url': avatar_url or '',
+            }
+            for pk, username, display_name, avatar_url in rows
+        }
+        _identities.set_many(fresh)
+        identities.update(fresh)
+    return identities
+
+
+def get_identity(user_id):
+    return load_identities([user_id])[user_id]
+
+
+def invalidate_identity(user_id):
+    _identities.delete(user_id)
@@ -0,0 +1,225 @@
+import json
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection, connections
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from tweet import dbhealth
+from tweet.models import Like, Tweet
+
+DEFAULT_ENDPOINTS = ('tweets_list', 'tweet_detail', 'like_toggle', 'notifications', 'profile')
+ENDPOINTS = DEFAULT_ENDPOINTS + ('home', 'for_you', 'search')
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Workload:
+    """Request generators for each benchmarked endpoint, sharing sampled ids."""
+
+    def __init__(self, rng, usernames, tweet_ids):
+        self.rng = rng
+        self.usernames = usernames
+        self.tweet_ids = tweet_ids
+        self.cursor = None
+        self.lock = threading.Lock()
+
+    def tweet_id(self):
+        with self.lock:
+            return self.rng.choice(self.tweet_ids)
+
+    def tweets_list(self, client):
+        # Walk the feed page by page, starting over at the end.
+        with self.lock:
+            cursor = self.cursor
+        response = client.get('/api/tweets/', {'cursor': cursor} if cursor else {})
+        if response.status_code == 200:
+            with self.lock:
+                self.cursor = response.json()['next']
+        return response
+
+    def tweet_detail(self, client):
+        return client.get(f'/api/tweets/{self.tweet_id()}/')
+
+    def like_toggle(self, client):
+        return client.post(f'/api/tweets/{self.tweet_id()}/like/')
+
+    def notifications(self, client):
+        return client.get('/api/notifications/')
+
+    def profile(self, client):
+        with self.lock:
+            username = self.rng.choice(self.usernames)
+        return client.get(f'/api/profile/{username}/')
+
+    def home(self, client):
+        return client.get('/api/tweets/home/')
+
+    def for_you(self, client):
+        return client.get('/api/tweets/', {'feed': 'for_you'})
+
+    def search(self, client):
+        return client.get('/api/search/', {'q': self.rng.choice(('coffee', 'music', 'django react', 'travel'))})
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=settings.BASE_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive the REST API in-process through the test client and report p50/p95/p99 '
+        'latency, throughput, SQL queries and new DB connections per endpoint. Seed data '
+        'first with seed_data. like_toggle writes to the database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests per endpoint.')
+        parser.add_argument('--concurrency', type=int, default=1)
+        parser.add_argument('--endpoints', nargs='+', default=list(DEFAULT_ENDPOINTS), choices=ENDPOINTS)
+        parser.add_argument('--username', help='User to log in as (default: the user with most likes received).')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write results as JSON to this path.')
+
+    def handle(self, *args, **options):
+        # Snowflake ids are sparse, so sample real ones.
+        tweet_ids = list(Tweet.objects.order_by('?').values_list('id', flat=True)[:10000])
+        if not tweet_ids:
+            raise CommandError('No tweets; run seed_data first.')
+        user = self.get_user(options['username'])
+        workload = Workload(
+            random.Random(options['seed']),
+            list(User.objects.order_by('?').values_list('username', flat=True)[:1000]),
+            sorted(tweet_ids),
+        )
+
+        results = {
+            'commit': git_commit(),
+            'started_at': timezone.now().isoformat(),
+            'database': {
+                'vendor': connection.vendor,
+                'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+                'pool': connection.settings_dict['OPTIONS'].get('pool'),
+            },
+            'user': user.username,
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'dataset': {
+                'users': User.objects.count(),
+                'tweets': Tweet.objects.count(),
+                'likes': Like.objects.count(),
+            },
+            'endpoints': {},
+        }
+        # Measure the endpoints, not the write rate limits.
+        with override_settings(THROTTLE_BUCKETS={}):
+            for name in options['endpoints']:
+                request = getattr(workload, name)
+                self.run(user, request, options['warmup'], options['concurrency'])
+                stats = self.run(user, request, options['requests'], options['concurrency'])
+                results['endpoints'][name] = stats
+                self.stdout.write(
+                    f"{name:<14} p50 {stats['p50_ms']:>8.2f} ms  p95 {stats['p95_ms']:>8.2f} ms  "
+                    f"p99 {stats['p99_ms']:>8.2f} ms  {stats['throughput_rps']:>8.1f} req/s  "
+                    f"{stats['queries_mean']:>5.1f} queries  {stats['connections_opened']} conns  "
+                    f"{stats['errors']} errors"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def get_user(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'No user {username!r}.')
+        user_id = Tweet.objects.order_by('-like_count').values_list('user_id', flat=True).first()
+        return User.objects.get(pk=user_id)
+
+    def run(self, user, request, total, concurrency):
+        """Issue ``total`` requests over ``concurrency`` threads; return summary stats."""
+        samples = []
+        lock = threading.Lock()
+        per_thread = [total // concurrency + (i < total % concurrency) for i in range(concurrency)]
+
+        def worker(count):
+            client = Client(HTTP_HOST=_host())
+            client.force_login(user)
+            try:
+                for _ in range(count):
+                    counter = QueryCounter()
+                    start = time.perf_counter()
+                    # The test client skips the handler's connection housekeeping;
+                    # redo it so CONN_MAX_AGE / pooling show up in the timings.
+                    close_old_connections()
+                    with connection.execute_wrapper(counter):
+                        response = request(client)
+                    close_old_connections()
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        samples.append((elapsed, counter.count, response.status_code))
+            finally:
+                connections.close_all()
+
+        opened = dbhealth.opened_count()
+        started = time.perf_counter()
+        if concurrency == 1:
+            worker(total)
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(worker, per_thread))
+        wall = time.perf_counter() - started
+
+        latencies = sorted(elapsed * 1000 for elapsed, _, _ in samples)
+        queries = [count for _, count, _ in samples]
+        statuses = {}
+        for _, _, code in samples:
+            statuses[str(code)] = statuses.get(str(code), 0) + 1
+        return {
+            'requests': len(samples),
+            'errors': sum(1 for _, _, code in samples if code >= 400),
+            'status_counts': statuses,
+            'p50_ms': percentile(latencies, 50) or 0.0,
+            'p95_ms': percentile(latencies, 95) or 0.0,
+            'p99_ms': percentile(latencies, 99) or 0.0,
+            'mean_ms': sum(latencies) / len(latencies) if latencies else 0.0,
+            'throughput_rps': len(samples) / wall if wall else 0.0,
+            'queries_mean': sum(queries) / len(queries) if queries else 0.0,
+            'queries_max': max(queries, default=0),
+            'connections_opened': dbhealth.opened_count() - opened,
+        }
+
+
+def _host():
+    hosts = [host for host in settings.ALLOWED_HOSTS if host and host != '*' and not host.startswith('.')]
+    return hosts[0] if hosts else 'localhost'
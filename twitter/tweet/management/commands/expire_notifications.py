@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tweet.retention import Archive, expire_notifications
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete read notifications older than NOTIFICATION_RETENTION_DAYS and any older than '
+        'NOTIFICATION_MAX_AGE_DAYS, in small batches, archiving them as gzipped JSON Lines '
+        'first. Run periodically.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--archive-dir', default=getattr(settings, 'NOTIFICATION_ARCHIVE_DIR', ''),
+                            help='Where to write the archive (default: NOTIFICATION_ARCHIVE_DIR).')
+        parser.add_argument('--no-archive', action='store_true', help='Delete without archiving.')
+        parser.add_argument('--dry-run', action='store_true', help='Count what would be removed.')
+
+    def handle(self, *args, **options):
+        archive = None
+        if options['archive_dir'] and not options['no_archive'] and not options['dry_run']:
+            name = f"notifications-{timezone.now().strftime('%Y%m%dT%H%M%S')}.jsonl.gz"
+            archive = Archive(options['archive_dir'], name)
+        try:
+            removed = expire_notifications(archive=archive, dry_run=options['dry_run'])
+        finally:
+            if archive is not None:
+                archive.close()
+        verb = 'Would remove' if options['dry_run'] else 'Removed'
+        where = f' (archived to {archive.path})' if archive is not None and removed else ''
+        self.stdout.write(self.style.SUCCESS(f'{verb} {removed} notifications{where}.'))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tweet.models import Tweet
+from tweet.search import get_backend
+from tweet.sharding import each_shard
+
+
+class Command(BaseCommand):
+    help = 'Build the full-text search index for all tweets in streaming batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        backend = get_backend()
+        indexed = 0
+
+        # The index is on default; the tweets are on every shard.
+        for tweets in each_shard(Tweet.objects.all()):
+            last_id = 0
+            while True:
+                rows = list(
+                    tweets.filter(id__gt=last_id)
+                    .order_by('id')
+                    .values_list('id', 'text')[:batch_size]
+                )
+                if not rows:
+                    break
+                with transaction.atomic():
+                    backend.index(rows)
+                last_id = rows[-1][0]
+                indexed += len(rows)
+                self.stdout.write(f'Indexed {indexed} tweets (last id {last_id})')
+
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} tweets.'))
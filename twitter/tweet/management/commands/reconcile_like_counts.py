@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from tweet.models import Tweet, Like
+from tweet.sharding import each_shard, is_sharded
+
+
+class Command(BaseCommand):
+    help = 'Recompute Tweet.like_count from the Like table in batches to repair drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        checked = repaired = 0
+
+        # Tweets live on their authors' shards and likes on their likers', so
+        # each shard's tweets are checked against likes from every shard.
+        for tweets in each_shard(Tweet.objects.all()):
+            last_id = 0
+            while True:
+                batch = list(
+                    tweets.filter(id__gt=last_id)
+                    .order_by('id')
+                    .values_list('id', 'like_count')[:batch_size]
+                )
+                if not batch:
+                    break
+                last_id = batch[-1][0]
+
+                actual = {}
+                for likes in each_shard(Like.objects.filter(tweet_id__in=[pk for pk, _ in batch])):
+                    for tweet_id, n in likes.values('tweet_id').annotate(n=Count('id')).values_list('tweet_id', 'n'):
+                        actual[tweet_id] = actual.get(tweet_id, 0) + n
+                stale = [pk for pk, stored in batch if stored != actual.get(pk, 0)]
+                if stale and not is_sharded():
+                    # Recount inside the UPDATE so likes landing mid-batch are not lost.
+                    likes = (Like.objects.filter(tweet=OuterRef('pk'))
+                             .values('tweet').annotate(n=Count('pk')).values('n'))
+                    tweets.filter(id__in=stale).update(
+                        like_count=Coalesce(Subquery(likes, output_field=IntegerField()), 0))
+                else:
+                    # A subquery cannot reach the other shards; write the totals counted above.
+                    for pk in stale:
+                        tweets.filter(pk=pk).update(like_count=actual.get(pk, 0))
+
+                checked += len(batch)
+                repaired += len(stale)
+
+        self.stdout.write(self.style.SUCCESS(f'Checked {checked} tweets, repaired {repaired}.'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from tweet.models import UserProfile
+from tweet.stats import recount
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized UserProfile counters from the source tables in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = 0
+        updated = 0
+
+        while True:
+            ids = list(
+                UserProfile.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            # Counted inside the UPDATE so writes landing mid-batch are not lost.
+            updated += recount(UserProfile.objects.filter(id__in=ids))
+            last_id = ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f'Recounted {updated} profiles.'))
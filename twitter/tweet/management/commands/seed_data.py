@@ -0,0 +1,226 @@
+import math
+import random
+from array import array
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from tweet.models import Follow, Like, Notification, Tweet, UserProfile
+from tweet.notifications import coalesce_window_start
+from tweet.sharding import is_sharded
+
+WORDS = (
+    'the a of to and in is it you that was for on are with as be at this have from or one had by '
+    'word but not what all were when we there can an your which their said if do will each about '
+    'how up out them then she many some so these would other into has more her two like him see '
+    'time could no make than first been its who now people my made over did down only way find '
+    'use may water long little very after words called just where most know django react api '
+    'coffee music weekend travel football coding design startup cats dogs movie book news'
+).split()
+HASHTAGS = ('python', 'django', 'react', 'music', 'news', 'sports', 'travel', 'food', 'tech', 'art')
+
+
+class ZipfSampler:
+    """
+    Ranks ``0..n-1`` with P(rank k) ~ 1 / (k + 1) ** s, via the inverse CDF of
+    the continuous power law (no per-item table, so it scales to 10M items).
+    Ranks are scattered over the id range by a stride coprime with ``n`` so the
+    popular items are not all the oldest ones.
+    """
+
+    def __init__(self, n, s, rng):
+        self.n = n
+        self.s = s
+        self.rng = rng
+        stride = 2654435761 % n or 1
+        while math.gcd(stride, n) != 1:
+            stride += 1
+        self.stride = stride
+
+    def rank(self):
+        u = self.rng.random()
+        if abs(self.s - 1.0) < 1e-9:
+            x = self.n ** u
+        else:
+            x = ((self.n ** (1 - self.s) - 1) * u + 1) ** (1 / (1 - self.s))
+        return min(int(x), self.n) - 1
+
+    def sample(self):
+        return (self.rank() * self.stride) % self.n
+
+    def distinct(self, k, exclude=None):
+        """Up to ``k`` distinct samples; gives up early on very skewed tails."""
+        chosen = set()
+        for _ in range(k * 20):
+            if len(chosen) == k:
+                break
+            item = self.sample()
+            if item != exclude:
+                chosen.add(item)
+        return chosen
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep the ``created_at`` values we generate."""
+    fields = [model._meta.get_field('created_at') for model in models]
+    saved = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, saved):
+            field.auto_now_add = value
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a synthetic dataset with bulk_create in streaming batches: users, '
+        'tweets, a Zipf-distributed like and follow graph, and coalesced like '
+        'notifications. E.g. --users 100000 --tweets 10000000 for a large run. '
+        'Run on a fresh, unsharded database; search, trends and timelines are not populated '
+        '(see rebuild_search_index and update_tweet_scores).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--tweets', type=int, default=10000)
+        parser.add_argument('--likes-per-user', type=int, default=20)
+        parser.add_argument('--follows-per-user', type=int, default=20)
+        parser.add_argument('--zipf', type=float, default=1.1, help='Zipf exponent for likes, follows and authorship.')
+        parser.add_argument('--days', type=int, default=30, help='Spread tweet timestamps over this many days.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='seed', help='Username prefix for generated users.')
+        parser.add_argument('--password', default='password')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for reproducible datasets.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 2 or options['tweets'] < 1:
+            raise CommandError('Need at least 2 users and 1 tweet.')
+        if is_sharded():
+            raise CommandError('seed_data writes to a single database; unset DATABASE_SHARD_URLS.')
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.zipf = options['zipf']
+        self.end = timezone.now()
+        self.span = timedelta(days=options['days']).total_seconds()
+
+        with explicit_timestamps(Tweet, Like, Follow, Notification):
+            user_ids = self.seed_users(options['users'], options['prefix'], options['password'])
+            tweet_ids = self.seed_tweets(options['tweets'], user_ids)
+            self.seed_follows(user_ids, options['follows_per_user'])
+            self.seed_likes(user_ids, tweet_ids, options['likes_per_user'])
+            self.seed_notifications(tweet_ids)
+        call_command('reconcile_like_counts', batch_size=self.batch_size, stdout=self.stdout)
+        call_command('reconcile_profile_stats', batch_size=self.batch_size, stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS('Seeding complete.'))
+
+    # --- helpers ---
+
+    def insert(self, model, rows, label, **kwargs):
+        """bulk_create ``rows`` (any iterable) in batches, one transaction each."""
+        total = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == self.batch_size:
+                total += self._flush(model, batch, **kwargs)
+                batch = []
+                self.stdout.write(f'  {label}: {total}')
+        if batch:
+            total += self._flush(model, batch, **kwargs)
+        self.stdout.write(f'{label}: {total}')
+        return total
+
+    def _flush(self, model, batch, **kwargs):
+        with transaction.atomic():
+            model.objects.bulk_create(batch, **kwargs)
+        return len(batch)
+
+    def tweet_time(self, offset, count):
+        # Tweets are spread evenly over the window, oldest first.
+        return self.end - timedelta(seconds=self.span * (1 - offset / count))
+
+    def later_than(self, moment):
+        return moment + (self.end - moment) * self.rng.random()
+
+    # --- phases ---
+
+    def seed_users(self, n, prefix, password):
+        start = User.objects.filter(username__startswith=prefix).count()
+        before = User.objects.aggregate(last=Max('id'))['last'] or 0
+        hashed = make_password(password)
+        self.insert(User, (User(username=f'{prefix}{i}', password=hashed) for i in range(start, start + n)), 'users')
+        user_ids = list(User.objects.filter(id__gt=before, username__startswith=prefix)
+                        .order_by('id').values_list('id', flat=True))
+        self.insert(UserProfile, (UserProfile(user_id=pk, display_name=f'Seed {pk}') for pk in user_ids),
+                    'profiles', ignore_conflicts=True)
+        return user_ids
+
+    def seed_tweets(self, n, user_ids):
+        """Insert ``n`` tweets; return their ids, oldest first."""
+        authors = ZipfSampler(len(user_ids), self.zipf, self.rng)
+        before = Tweet.objects.aggregate(last=Max('id'))['last'] or 0
+
+        def rows():
+            for offset in range(n):
+                words = self.rng.choices(WORDS, k=self.rng.randint(4, 30))
+                if self.rng.random() < 0.2:
+                    words.append('#' + self.rng.choice(HASHTAGS))
+                yield Tweet(user_id=user_ids[authors.sample()], text=' '.join(words)[:280],
+                            created_at=self.tweet_time(offset, n))
+
+        self.insert(Tweet, rows(), 'tweets')
+        return array('q', Tweet.objects.filter(id__gt=before).order_by('id')
+                     .values_list('id', flat=True).iterator(chunk_size=self.batch_size))
+
+    def seed_follows(self, user_ids, per_user):
+        followees = ZipfSampler(len(user_ids), self.zipf, self.rng)
+
+        def rows():
+            for index, follower in enumerate(user_ids):
+                for followee in followees.distinct(per_user, exclude=index):
+                    yield Follow(follower_id=follower, followee_id=user_ids[followee],
+                                 created_at=self.later_than(self.end - timedelta(seconds=self.span)))
+
+        self.insert(Follow, rows(), 'follows', ignore_conflicts=True)
+
+    def seed_likes(self, user_ids, tweet_ids, per_user):
+        count = len(tweet_ids)
+        tweets = ZipfSampler(count, self.zipf, self.rng)
+
+        def rows():
+            for user_id in user_ids:
+                for offset in tweets.distinct(per_user):
+                    yield Like(user_id=user_id, tweet_id=tweet_ids[offset],
+                               created_at=self.later_than(self.tweet_time(offset, count)))
+
+        self.insert(Like, rows(), 'likes', ignore_conflicts=True)
+
+    def seed_notifications(self, tweet_ids):
+        """One coalesced like notification per liked tweet, as ``notify`` would leave it."""
+        groups = (
+            Like.objects.filter(tweet_id__gte=min(tweet_ids), tweet_id__lte=max(tweet_ids))
+            .values('tweet_id', 'tweet__user_id')
+            .annotate(n=Count('id'), actor=Max('user_id'), last=Max('created_at'))
+            .order_by()
+        )
+
+        def rows():
+            for group in groups.iterator(chunk_size=self.batch_size):
+                if group['actor'] == group['tweet__user_id']:
+                    continue
+                yield Notification(recipient_id=group['tweet__user_id'], actor_id=group['actor'],
+                                   verb='like', tweet_id=group['tweet_id'], actor_count=group['n'],
+                                   window_start=coalesce_window_start(group['last']),
+                                   created_at=group['last'])
+
+        self.insert(Notification, rows(), 'notifications')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from tweet.ranking import update_scores
+
+
+class Command(BaseCommand):
+    help = 'Incrementally rescore tweets posted or liked since the last run (schedule periodically).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = update_scores(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rescored {updated} tweets.'))
@@ -0,0 +1,110 @@
+"""
+Out-of-band photo ingestion.
+
+``stage_photo()`` runs in the request: it copies the upload to a local
+staging directory, marks the tweet ``processing`` and schedules
+``process_photo()``. The worker uploads the original and the resized
+variants named in ``PHOTO_VARIANTS`` to ``PHOTO_STORAGE`` and writes their
+final URLs onto the tweet, so reads never build URLs. Staging is local disk,
+so the worker must run on the host that received the upload (true for the
+in-process task runner).
+"""
+import logging
+import os
+import uuid
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from PIL import Image, ImageOps
+
+from .models import Tweet
+from .tasks import enqueue
+
+logger = logging.getLogger(__name__)
+
+# Variant name -> Tweet field holding its URL.
+VARIANT_FIELDS = {
+    'feed': 'photo_url',
+    'thumb': 'photo_thumb_url',
+}
+
+
+def staging_storage():
+    return FileSystemStorage(location=getattr(
+        settings, 'PHOTO_STAGING_ROOT', os.path.join(settings.BASE_DIR, 'media', 'staging')))
+
+
+def photo_storage():
+    backend = getattr(settings, 'PHOTO_STORAGE', 'django.core.files.storage.FileSystemStorage')
+    return import_string(backend)(**getattr(settings, 'PHOTO_STORAGE_OPTIONS', {}))
+
+
+def variant_sizes():
+    return getattr(settings, 'PHOTO_VARIANTS', {'feed': 1200, 'thumb': 400})
+
+
+def stage_photo(tweet, upload):
+    """Stage ``upload`` for ``tweet`` and schedule processing; ``False`` clears the photo."""
+    if upload is None:
+        return
+    if upload is False:
+        _set_photo_fields(tweet, photo=None, photo_status='', photo_url='', photo_thumb_url='',
+                          photo_original_url='')
+        return
+    ext = os.path.splitext(upload.name)[1].lower()
+    staged = staging_storage().save(f'{tweet.pk}/{uuid.uuid4().hex}{ext}', upload)
+    _set_photo_fields(tweet, photo_status=Tweet.PHOTO_PROCESSING)
+    enqueue(process_photo, tweet.pk, staged)
+
+
+def _set_photo_fields(tweet, **fields):
+    fields['updated_at'] = timezone.now()
+    Tweet.objects.for_id(tweet.pk).filter(pk=tweet.pk).update(**fields)
+    for name, value in fields.items():
+        setattr(tweet, name, value)
+
+
+def process_photo(tweet_id, staged):
+    staging = staging_storage()
+    try:
+        if not Tweet.objects.for_id(tweet_id).filter(pk=tweet_id).exists():
+            return
+        try:
+            urls = _publish(tweet_id, staging, staged)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            logger.warning('Could not process photo for tweet %s', tweet_id, exc_info=True)
+            Tweet.objects.for_id(tweet_id).filter(pk=tweet_id).update(
+                photo_status=Tweet.PHOTO_FAILED, updated_at=timezone.now())
+            return
+        Tweet.objects.for_id(tweet_id).filter(pk=tweet_id).update(
+            photo_status=Tweet.PHOTO_READY, updated_at=timezone.now(), **urls)
+    finally:
+        staging.delete(staged)
+
+
+def _publish(tweet_id, staging, staged):
+    """Upload the original and each variant; return ``{field: url}``."""
+    storage = photo_storage()
+    ext = os.path.splitext(staged)[1]
+    with staging.open(staged) as f:
+        image = Image.open(f)
+        image.load()
+        f.seek(0)
+        name = storage.save(f'tweets/{tweet_id}/original{ext}', File(f))
+    urls = {'photo_original_url': storage.url(name)}
+
+    image = ImageOps.exif_transpose(image)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    for variant, size in variant_sizes().items():
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        buffer = BytesIO()
+        resized.save(buffer, 'JPEG', quality=85, optimize=True, progressive=True)
+        name = storage.save(f'tweets/{tweet_id}/{variant}.jpg', ContentFile(buffer.getvalue()))
+        urls[VARIANT_FIELDS[variant]] = storage.url(name)
+    return urls
@@ -0,0 +1,112 @@
+"""
+Per-request SQL and timing metrics.
+
+``RequestMetricsMiddleware`` opens a ``RequestMetrics`` for a sampled share
+of requests (``REQUEST_METRICS_SAMPLE_RATE``). Every database connection
+carries ``record_query`` as an execute wrapper (installed from
+``TweetConfig.ready``); it finds the current
+request's metrics through a context variable, so queries issued from
+``sync_to_async`` threads are counted too, and background tasks are not.
+Code that wants its own bucket in ``Server-Timing`` uses ``measure(name)``
+as a context manager or decorator; it costs nothing for unsampled requests.
+
+Query shapes (SQL with ``IN (...)`` lists collapsed) seen at least
+``REQUEST_METRICS_N_PLUS_ONE_THRESHOLD`` times in one request are reported
+as N+1 suspects.
+"""
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_current = ContextVar('request_metrics', default=None)
+
+IN_LIST_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+NUMBER_RE = re.compile(r'\b\d+\b')
+
+
+def sample_rate():
+    return getattr(settings, 'REQUEST_METRICS_SAMPLE_RATE', 0.0)
+
+
+def n_plus_one_threshold():
+    return getattr(settings, 'REQUEST_METRICS_N_PLUS_ONE_THRESHOLD', 5)
+
+
+def query_shape(sql):
+    return NUMBER_RE.sub('N', IN_LIST_RE.sub('(...)', sql))
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.timings = {}
+        self.shapes = Counter()
+
+    def add_query(self, sql, duration, many=False):
+        self.query_count += 1
+        self.db_time += duration
+        self.shapes[query_shape(sql)] += 1
+
+    def add_timing(self, name, duration):
+        self.timings[name] = self.timings.get(name, 0.0) + duration
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def suspects(self):
+        threshold = n_plus_one_threshold()
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+    def server_timing(self):
+        parts = [f'db;dur={self.db_time * 1000:.1f};desc="{self.query_count} queries"']
+        parts += [f'{name};dur={duration * 1000:.1f}' for name, duration in self.timings.items()]
+        parts.append(f'total;dur={self.elapsed() * 1000:.1f}')
+        return ', '.join(parts)
+
+
+def current():
+    return _current.get()
+
+
+def start():
+    return _current.set(RequestMetrics())
+
+
+def stop(token):
+    _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, time.perf_counter() - started, many)
+
+
+def install(connection, **kwargs):
+    """``connection_created`` receiver: attach ``record_query`` once per connection."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def measure(name):
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_timing(name, time.perf_counter() - started)
@@ -0,0 +1,108 @@
+import json
+import logging
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from . import metrics, routers
+
+logger = logging.getLogger('tweet.metrics')
+
+
+class RequestMetricsMiddleware:
+    """
+    Record query count, DB time and ``measure()`` spans for a sampled share
+    of requests; report them in ``Server-Timing`` and one JSON log line on
+    the ``tweet.metrics`` logger, with repeated query shapes flagged as N+1
+    suspects.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        token = metrics.start()
+        try:
+            response = self.get_response(request)
+            self.report(request, response, metrics.current())
+        finally:
+            metrics.stop(token)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        token = metrics.start()
+        try:
+            response = await self.get_response(request)
+            self.report(request, response, metrics.current())
+        finally:
+            metrics.stop(token)
+        return response
+
+    def sampled(self):
+        rate = metrics.sample_rate()
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def report(self, request, response, current):
+        if response.streaming:
+            return  # the body has not run yet
+        response['Server-Timing'] = current.server_timing()
+        suspects = current.suspects()
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(current.elapsed() * 1000, 1),
+            'queries': current.query_count,
+            'db_ms': round(current.db_time * 1000, 1),
+            'timings_ms': {name: round(value * 1000, 1) for name, value in current.timings.items()},
+            'n_plus_one': [{'count': count, 'sql': shape[:300]} for shape, count in suspects],
+        }
+        logger.log(logging.WARNING if suspects else logging.INFO, json.dumps(record))
+
+
+class ReplicaMiddleware:
+    """
+    Let ``ReplicaRouter`` send this request's reads to a replica when it is a
+    safe method from a client that has not written recently; after a
+    successful write, pin the client to the primary (see tweet/routers.py).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with routers.replica_reads(self.replica_safe(request)):
+            response = self.get_response(request)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        with routers.replica_reads(self.replica_safe(request)):
+            response = await self.get_response(request)
+        return self.finish(request, response)
+
+    def replica_safe(self, request):
+        return request.method in routers.SAFE_METHODS and not routers.is_pinned(request)
+
+    def finish(self, request, response):
+        if (request.method not in routers.SAFE_METHODS and response.status_code < 400
+                and routers.replica_aliases()):
+            routers.pin(response)
+        return response
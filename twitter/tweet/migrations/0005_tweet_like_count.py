@@ -0,0 +1,29 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:12
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_like_count(apps, schema_editor):
+    Tweet = apps.get_model('tweet', 'Tweet')
+    Like = apps.get_model('tweet', 'Like')
+    likes = (Like.objects.filter(tweet=OuterRef('pk'))
+             .values('tweet').annotate(n=Count('pk')).values('n'))
+    Tweet.objects.update(like_count=Coalesce(Subquery(likes, output_field=IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tweet', '0004_tweet_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tweet',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_like_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:05
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def backfill_read_watermark(apps, schema_editor):
+    Notification = apps.get_model('tweet', 'Notification')
+    UserProfile = apps.get_model('tweet', 'UserProfile')
+    latest_read = (Notification.objects.filter(is_read=True)
+                   .values('recipient').annotate(read_at=Max('created_at')))
+    for row in latest_read.iterator():
+        UserProfile.objects.update_or_create(
+            user_id=row['recipient'], defaults={'notifications_read_at': row['read_at']})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tweet', '0007_notification_coalescing'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='notifications_read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_read_watermark, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='notification',
+            name='is_read',
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'created_at'], name='notif_recipient_created_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:20
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE tweet_search USING fts5(text, tokenize='unicode61')")
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE TABLE tweet_search ('
+            'tweet_id bigint PRIMARY KEY REFERENCES tweet_tweet (id) ON DELETE CASCADE, '
+            'document tsvector NOT NULL)')
+        schema_editor.execute(
+            'CREATE INDEX tweet_search_document_idx ON tweet_search USING GIN (document)')
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute('DROP TABLE IF EXISTS tweet_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tweet', '0009_userprofile_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tweet', '0010_tweet_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Hashtag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='verb',
+            field=models.CharField(choices=[('like', 'Like'), ('reply', 'Reply'), ('follow', 'Follow'), ('mention', 'Mention')], max_length=10),
+        ),
+        migrations.CreateModel(
+            name='Mention',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('tweet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to='tweet.tweet')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'created_at'], name='mention_user_created_idx')],
+                'unique_together': {('tweet', 'user')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('hashtag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trend_buckets', to='tweet.hashtag')),
+            ],
+            options={
+                'unique_together': {('bucket_start', 'hashtag')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TweetHashtag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('hashtag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tweet_links', to='tweet.hashtag')),
+                ('tweet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hashtag_links', to='tweet.tweet')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hashtag', 'created_at', 'tweet'], name='tweethashtag_tag_created_idx')],
+                'unique_together': {('tweet', 'hashtag')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tweet', '0011_hashtags_mentions_trends'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TweetScore',
+            fields=[
+                ('tweet', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score', serialize=False, to='tweet.tweet')),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['score', 'tweet'], name='tweetscore_score_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 6.0.2 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+
+def backfill_photo_urls(apps, schema_editor):
+    # Legacy Cloudinary photos: persist the URL once so reads stop building it.
+    Tweet = apps.get_model('tweet', 'Tweet')
+    batch = []
+    for tweet in Tweet.objects.exclude(photo__isnull=True).exclude(photo='').only('id', 'photo').iterator():
+        url = tweet.photo.url
+        tweet.photo_url = tweet.photo_thumb_url = tweet.photo_original_url = url
+        tweet.photo_status = 'ready'
+        batch.append(tweet)
+        if len(batch) == 500:
+            Tweet.objects.bulk_update(batch, ['photo_url', 'photo_thumb_url', 'photo_original_url', 'photo_status'])
+            batch = []
+    Tweet.objects.bulk_update(batch, ['photo_url', 'photo_thumb_url', 'photo_original_url', 'photo_status'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tweet', '0012_tweet_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tweet',
+            name='photo_original_url',
+            field=models.URLField(blank=True, default='', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='tweet',
+            name='photo_status',
+            field=models.CharField(blank=True, choices=[('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='tweet',
+            name='photo_thumb_url',
+            field=models.URLField(blank=True, default='', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='tweet',
+            name='photo_url',
+            field=models.URLField(blank=True, default='', max_length=500),
+        ),
+        migrations.RunPython(backfill_photo_urls, migrations.RunPython.noop),
+    ]
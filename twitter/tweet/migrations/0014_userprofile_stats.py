@@ -0,0 +1,62 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:40
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_stats(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    UserProfile = apps.get_model('tweet', 'UserProfile')
+    Tweet = apps.get_model('tweet', 'Tweet')
+    Like = apps.get_model('tweet', 'Like')
+    Follow = apps.get_model('tweet', 'Follow')
+
+    # Profile reads no longer get_or_create, so every user needs a row.
+    missing = User.objects.filter(profile__isnull=True).values_list('pk', flat=True)
+    UserProfile.objects.bulk_create([UserProfile(user_id=pk) for pk in missing], batch_size=1000)
+
+    def count(model, field):
+        rows = (model.objects.filter(**{field: OuterRef('user_id')})
+                .values(field).annotate(n=Count('pk')).values('n'))
+        return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+    UserProfile.objects.update(
+        tweets_count=count(Tweet, 'user'),
+        likes_count=count(Like, 'user'),
+        followers_count=count(Follow, 'followee'),
+        following_count=count(Follow, 'follower'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tweet', '0013_tweet_photo_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='tweets_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
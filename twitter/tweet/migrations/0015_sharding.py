@@ -0,0 +1,89 @@
+# Generated by Django 6.0.2 on 2026-10-18 17:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def drop_search_constraint(apps, schema_editor):
+    # Search rows stay on the default database; their tweets may not.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'ALTER TABLE tweet_search DROP CONSTRAINT IF EXISTS tweet_search_tweet_id_fkey')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tweet', '0014_userprofile_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='like',
+            name='id',
+            field=models.BigIntegerField(editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='like',
+            name='tweet',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='likes', to='tweet.tweet'),
+        ),
+        migrations.AlterField(
+            model_name='like',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='likes', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='mention',
+            name='tweet',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to='tweet.tweet'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='actor',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='actions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='id',
+            field=models.BigIntegerField(editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='recipient',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='tweet',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='tweet.tweet'),
+        ),
+        migrations.AlterField(
+            model_name='timelineentry',
+            name='tweet',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='tweet.tweet'),
+        ),
+        migrations.AlterField(
+            model_name='tweet',
+            name='id',
+            field=models.BigIntegerField(editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='tweet',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='tweets', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='tweethashtag',
+            name='tweet',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='hashtag_links', to='tweet.tweet'),
+        ),
+        migrations.AlterField(
+            model_name='tweetscore',
+            name='tweet',
+            field=models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score', serialize=False, to='tweet.tweet'),
+        ),
+        migrations.RunPython(drop_search_constraint, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 6.0.2 on 2026-10-18 21:10
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def window_start(moment, size):
+    return moment - timedelta(seconds=moment.timestamp() % size)
+
+
+def coalesce_existing(apps, schema_editor):
+    """
+    Move existing entries into the fixed window of their ``created_at`` (0007
+    gave every older row the same migration-time ``window_start``) and merge
+    entries sharing a window into the latest one, adding up their actors.
+    """
+    Notification = apps.get_model('tweet', 'Notification')
+    notifications = Notification.objects.using(schema_editor.connection.alias)
+    size = getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', 3600)
+    rows = (notifications.order_by('recipient_id', 'verb', 'tweet_id', 'created_at', 'id')
+            .values_list('id', 'recipient_id', 'verb', 'tweet_id', 'actor_count', 'created_at'))
+
+    kept, merged = [], []
+    latest, latest_key = None, None
+
+    def flush(force=False):
+        if force or len(kept) >= BATCH_SIZE:
+            notifications.bulk_update(kept, ['window_start', 'actor_count'], batch_size=BATCH_SIZE)
+            kept.clear()
+        if force or len(merged) >= BATCH_SIZE:
+            notifications.filter(id__in=merged).delete()
+            merged.clear()
+
+    for pk, recipient_id, verb, tweet_id, actor_count, created_at in rows.iterator(chunk_size=BATCH_SIZE):
+        key = (recipient_id, verb, tweet_id, window_start(created_at, size))
+        if key == latest_key:
+            # Rows come oldest first, so this one is the latest of its window so far.
+            merged.append(latest.id)
+            actor_count += latest.actor_count
+        elif latest is not None:
+            kept.append(latest)
+        latest, latest_key = Notification(id=pk, actor_count=actor_count, window_start=key[3]), key
+        flush()
+    if latest is not None:
+        kept.append(latest)
+    flush(force=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tweet', '0018_deferred_user_cascades'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Notifications live on every shard, so this runs on each of them (the
+        # model_name hint tells tweet.routers.ShardRouter it is not a backfill).
+        migrations.RunPython(coalesce_existing, migrations.RunPython.noop,
+                             hints={'model_name': 'notification'}),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('tweet__isnull', False)), fields=('recipient', 'verb', 'tweet', 'window_start'), name='notif_tweet_window_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('tweet__isnull', True)), fields=('recipient', 'verb', 'window_start'), name='notif_window_uniq'),
+        ),
+    ]
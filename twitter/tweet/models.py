@@ -1,9 +1,31 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 from cloudinary.models import CloudinaryField
 
+from .sharding import ShardedModelMixin, ShardedQuerySet
 
-class UserProfile(models.Model):
+
+class CounterFieldsMixin:
+    """
+    Counters listed in ``COUNTER_FIELDS`` are maintained with atomic F()
+    updates; a plain ``save()`` of an existing row never writes them back
+    from a possibly stale instance.
+    """
+    COUNTER_FIELDS = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.COUNTER_FIELDS
+                and f.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+
+class UserProfile(CounterFieldsMixin, models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     display_name = models.CharField(max_length=50, blank=True)
     bio = models.TextField(max_length=160, blank=True)
@@ -11,35 +33,95 @@ class UserProfile(models.Model):
     header_url = models.URLField(blank=True, default='')
     location = models.CharField(max_length=100, blank=True)
     website = models.URLField(blank=True, default='')
+    # Set once the user has too many followers to fan out on write; their
+    # tweets are merged into followers' home timelines at read time instead.
+    fanout_on_read = models.BooleanField(default=False)
+    # Notifications created at or before this instant count as read.
+    notifications_read_at = models.DateTimeField(null=True, blank=True)
+    # Denormalized stats, see tweet/stats.py.
+    tweets_count = models.PositiveIntegerField(default=0)
+    likes_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    COUNTER_FIELDS = ('tweets_count', 'likes_count', 'followers_count', 'following_count')
 
     def __str__(self):
         return f'{self.user.username} profile'
 
 
-class Tweet(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tweets')
+class Tweet(ShardedModelMixin, CounterFieldsMixin, models.Model):
+    PHOTO_PROCESSING = 'processing'
+    PHOTO_READY = 'ready'
+    PHOTO_FAILED = 'failed'
+    PHOTO_STATUSES = (
+        (PHOTO_PROCESSING, 'Processing'),
+        (PHOTO_READY, 'Ready'),
+        (PHOTO_FAILED, 'Failed'),
+    )
+
+    # Auto-increment, or a Snowflake id once sharded (see tweet/sharding.py).
+    # Sharded rows may point at users and tweets in other databases, hence no
+    # FK constraints or cascades here; dependent rows are purged in the
+    # background (tweet/retention.py).
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='tweets', db_constraint=False)
     text = models.TextField(max_length=280)
+    # Legacy synchronous upload; new photos go through tweet.media.
     photo = CloudinaryField('image', blank=True, null=True)
+    photo_status = models.CharField(max_length=10, choices=PHOTO_STATUSES, blank=True, default='')
+    # Final variant URLs, written once by the photo worker.
+    photo_url = models.URLField(max_length=500, blank=True, default='')
+    photo_thumb_url = models.URLField(max_length=500, blank=True, default='')
+    photo_original_url = models.URLField(max_length=500, blank=True, default='')
+    like_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    COUNTER_FIELDS = ('like_count',)
+    SHARD_KEY = 'user_id'
+
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='tweet_created_id_idx'),
+            models.Index(fields=['user', 'created_at', 'id'], name='tweet_user_created_id_idx'),
+        ]
 
     def __str__(self):
         return f'{self.user.username} - {self.text[:10]}'
 
-    @property
-    def like_count(self):
-        return self.likes.count()
 
+class TweetScore(models.Model):
+    """Precomputed "For You" rank for a tweet; see ``tweet.ranking``."""
+    tweet = models.OneToOneField(Tweet, on_delete=models.DO_NOTHING, primary_key=True, related_name='score',
+                                 db_constraint=False)
+    score = models.FloatField()
+    computed_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['score', 'tweet'], name='tweetscore_score_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.tweet_id}: {self.score:.4f}'
 
-class Like(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='likes')
-    tweet = models.ForeignKey(Tweet, on_delete=models.CASCADE, related_name='likes')
+
+class Like(ShardedModelMixin, models.Model):
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='likes', db_constraint=False)
+    tweet = models.ForeignKey(Tweet, on_delete=models.DO_NOTHING, related_name='likes', db_constraint=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    SHARD_KEY = 'user_id'
+
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         unique_together = ('user', 'tweet')
 
@@ -47,21 +129,130 @@ class Like(models.Model):
         return f'{self.user.username} liked {self.tweet.id}'
 
 
-class Notification(models.Model):
+class Follow(models.Model):
+    # A deleted user's follows, timeline and mentions are purged in the
+    # background like their tweets (tweet/retention.py), not in the request.
+    follower = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='following', db_constraint=False)
+    followee = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='followers', db_constraint=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('follower', 'followee')
+        indexes = [
+            models.Index(fields=['followee', 'follower'], name='follow_followee_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.follower.username} follows {self.followee.username}'
+
+
+class TimelineEntry(models.Model):
+    """One tweet in one user's materialized home timeline."""
+    owner = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='timeline_entries',
+                              db_constraint=False)
+    tweet = models.ForeignKey(Tweet, on_delete=models.DO_NOTHING, related_name='timeline_entries',
+                              db_constraint=False)
+    # Copy of tweet.created_at so a page is one range scan on the owner index.
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('owner', 'tweet')
+        indexes = [
+            models.Index(fields=['owner', 'created_at', 'tweet'], name='timeline_owner_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.tweet_id} in {self.owner_id} timeline'
+
+
+class Hashtag(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+
+    def __str__(self):
+        return f'#{self.name}'
+
+
+class TweetHashtag(models.Model):
+    tweet = models.ForeignKey(Tweet, on_delete=models.DO_NOTHING, related_name='hashtag_links',
+                              db_constraint=False)
+    hashtag = models.ForeignKey(Hashtag, on_delete=models.CASCADE, related_name='tweet_links')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('tweet', 'hashtag')
+        indexes = [
+            models.Index(fields=['hashtag', 'created_at', 'tweet'], name='tweethashtag_tag_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.tweet_id} #{self.hashtag_id}'
+
+
+class Mention(models.Model):
+    tweet = models.ForeignKey(Tweet, on_delete=models.DO_NOTHING, related_name='mentions', db_constraint=False)
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='mentions', db_constraint=False)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('tweet', 'user')
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='mention_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.tweet_id} @{self.user_id}'
+
+
+class TrendBucket(models.Model):
+    """How many tweets used ``hashtag`` in the bucket starting at ``bucket_start``."""
+    hashtag = models.ForeignKey(Hashtag, on_delete=models.CASCADE, related_name='trend_buckets')
+    bucket_start = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('bucket_start', 'hashtag')
+
+    def __str__(self):
+        return f'#{self.hashtag_id} @ {self.bucket_start}: {self.count}'
+
+
+class Notification(ShardedModelMixin, models.Model):
     NOTIFICATION_TYPES = (
         ('like', 'Like'),
         ('reply', 'Reply'),
         ('follow', 'Follow'),
+        ('mention', 'Mention'),
     )
-    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
-    actor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='actions')
+    id = models.BigAutoField(primary_key=True)
+    recipient = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='notifications',
+                                  db_constraint=False)
+    actor = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name='actions', db_constraint=False)
     verb = models.CharField(max_length=10, choices=NOTIFICATION_TYPES)
-    tweet = models.ForeignKey(Tweet, on_delete=models.CASCADE, null=True, blank=True)
-    is_read = models.BooleanField(default=False)
+    tweet = models.ForeignKey(Tweet, on_delete=models.DO_NOTHING, null=True, blank=True, db_constraint=False)
+    # Coalesced entries: ``actor`` is the latest actor, ``actor_count`` how many
+    # acted in the fixed window starting at ``window_start``; ``created_at``
+    # moves to the latest event. One entry per (recipient, verb, tweet, window).
+    actor_count = models.PositiveIntegerField(default=1)
+    window_start = models.DateTimeField(default=timezone.now)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    SHARD_KEY = 'recipient_id'
+
+    objects = ShardedQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', 'created_at'], name='notif_recipient_created_idx'),
+        ]
+        # Two constraints because NULLs never collide in a unique index: follow
+        # notifications have no tweet.
+        constraints = [
+            models.UniqueConstraint(fields=['recipient', 'verb', 'tweet', 'window_start'],
+                                    condition=models.Q(tweet__isnull=False), name='notif_tweet_window_uniq'),
+            models.UniqueConstraint(fields=['recipient', 'verb', 'window_start'],
+                                    condition=models.Q(tweet__isnull=True), name='notif_window_uniq'),
+        ]
 
     def __str__(self):
         return f'{self.actor.username} {self.verb} → {self.recipient.username}'
\ No newline at end of file
@@ -0,0 +1,191 @@
+"""
+Asynchronous, coalescing notification delivery.
+
+Request handlers call ``notify()`` and ``retract()``, which only schedule a
+background task (see ``tweet.tasks``). The task drops events whose underlying like or follow
+has since been undone, and folds events for the same (recipient, tweet, verb)
+in the same fixed ``NOTIFICATION_COALESCE_WINDOW``-second window into one
+aggregated row ("alice and 41 others liked your tweet"). A unique constraint
+on that key makes the first event of a window an insert that concurrent
+deliveries cannot duplicate; later ones update the row.
+
+Read state is a per-user watermark (``UserProfile.notifications_read_at``),
+so marking everything read is a single-row write. The unread badge count is
+kept in the cache, adjusted as entries are delivered or withdrawn, and only
+recounted from the ``(recipient, created_at)`` index on a cache miss.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Follow, Like, Mention, Notification, UserProfile
+from .realtime import get_broker, publish_on_commit, user_channel
+from .sharding import scatter, shard_for_user
+from .tasks import enqueue
+
+
+def coalesce_window():
+    return timedelta(seconds=getattr(settings, 'NOTIFICATION_COALESCE_WINDOW', 3600))
+
+
+def coalesce_window_start(moment):
+    """Start of the fixed coalescing window containing ``moment``."""
+    size = coalesce_window().total_seconds()
+    return moment - timedelta(seconds=moment.timestamp() % size)
+
+
+def unread_timeout():
+    return getattr(settings, 'NOTIFICATION_UNREAD_CACHE_TIMEOUT', 300)
+
+
+def unread_key(user_id):
+    return f'notif-unread:{user_id}'
+
+
+def read_watermark(user_id):
+    return (UserProfile.objects.filter(user_id=user_id)
+            .values_list('notifications_read_at', flat=True).first())
+
+
+def is_unread(notification, watermark):
+    return watermark is None or notification.created_at > watermark
+
+
+def unread_count(user_id):
+    count = cache.get(unread_key(user_id))
+    if count is None:
+        notifications = Notification.objects.for_user(user_id).filter(recipient_id=user_id)
+        watermark = read_watermark(user_id)
+        if watermark is not None:
+            notifications = notifications.filter(created_at__gt=watermark)
+        count = notifications.count()
+        cache.set(unread_key(user_id), count, unread_timeout())
+    return count
+
+
+def mark_all_read(user_id):
+    # Every user has a profile (see signals), so this is one UPDATE.
+    UserProfile.objects.filter(user_id=user_id).update(notifications_read_at=timezone.now())
+    cache.set(unread_key(user_id), 0, unread_timeout())
+    publish_on_commit(user_channel(user_id), {'type': 'notifications', 'unread_count': 0})
+
+
+def _adjust_unread(user_id, delta):
+    def apply():
+        try:
+            count = cache.incr(unread_key(user_id), delta)
+        except ValueError:
+            count = None  # not cached; the next read recounts
+        get_broker().publish(user_channel(user_id), {'type': 'notifications', 'unread_count': count})
+    # After the change to the recipient's notifications, on their shard, commits.
+    transaction.on_commit(apply, using=shard_for_user(user_id))
+
+
+def notify(verb, recipient_id, actor_id, tweet_id=None):
+    """Schedule a notification; never notifies users about their own actions."""
+    if recipient_id == actor_id:
+        return
+    enqueue(deliver, verb, recipient_id, actor_id, tweet_id)
+
+
+def retract(verb, recipient_id, actor_id, tweet_id=None):
+    """Schedule removal of an undone like or follow from its aggregated entry."""
+    if recipient_id == actor_id:
+        return
+    enqueue(withdraw, verb, recipient_id, actor_id, tweet_id)
+
+
+def deliver(verb, recipient_id, actor_id, tweet_id=None):
+    happened_at = _event_time(verb, recipient_id, actor_id, tweet_id)
+    if happened_at is None:
+        return
+    key = {'recipient_id': recipient_id, 'verb': verb, 'tweet_id': tweet_id,
+           'window_start': coalesce_window_start(happened_at)}
+    # New rows, so every open coalescing window, are on the recipient's own shard.
+    shard = shard_for_user(recipient_id)
+    notifications = Notification.objects.using(shard)
+    with transaction.atomic(using=shard):
+        try:
+            with transaction.atomic(using=shard):
+                notifications.create(actor_id=actor_id, **key)
+        except IntegrityError:
+            pass  # the window already has its entry, now certain to be there to lock
+        else:
+            _adjust_unread(recipient_id, 1)
+            return
+        notification = notifications.select_for_update().get(**key)
+        if not is_unread(notification, read_watermark(recipient_id)):
+            _adjust_unread(recipient_id, 1)
+        count = _count_actors(verb, recipient_id, tweet_id, notification.window_start)
+        notification.actor_id = actor_id
+        notification.actor_count = max(1, count if count is not None else notification.actor_count + 1)
+        notification.created_at = timezone.now()
+        notification.save(update_fields=['actor', 'actor_count', 'created_at'])
+
+
+def withdraw(verb, recipient_id, actor_id, tweet_id=None):
+    if _event_time(verb, recipient_id, actor_id, tweet_id) is not None:
+        return  # redone since
+    # The undone event fell in this window or the previous one.
+    since = coalesce_window_start(timezone.now() - coalesce_window())
+    shard = shard_for_user(recipient_id)
+    with transaction.atomic(using=shard):
+        notifications = (
+            Notification.objects.using(shard).select_for_update()
+            .filter(recipient_id=recipient_id, verb=verb, tweet_id=tweet_id, window_start__gte=since)
+        )
+        for notification in notifications:
+            _recount(notification, verb, recipient_id, actor_id, tweet_id)
+
+
+def _recount(notification, verb, recipient_id, actor_id, tweet_id):
+    count = _count_actors(verb, recipient_id, tweet_id, notification.window_start)
+    if count is None or count == notification.actor_count:
+        return
+    if count == 0:
+        if is_unread(notification, read_watermark(recipient_id)):
+            _adjust_unread(recipient_id, -1)
+        notification.delete()
+        return
+    notification.actor_count = count
+    if notification.actor_id == actor_id:
+        notification.actor_id = _latest_actor(verb, recipient_id, tweet_id)
+    notification.save(update_fields=['actor', 'actor_count'])
+
+
+def _event_time(verb, recipient_id, actor_id, tweet_id):
+    """When the underlying action happened, or None if it has been undone."""
+    if verb == 'like':
+        like = scatter(Like.objects.for_user(actor_id).filter(user_id=actor_id, tweet_id=tweet_id)
+                       .order_by('-created_at').only('created_at'), 1)
+        return like[0].created_at if like else None
+    if verb == 'follow':
+        return (Follow.objects.filter(follower_id=actor_id, followee_id=recipient_id)
+                .values_list('created_at', flat=True).first())
+    if verb == 'mention':
+        return (Mention.objects.filter(tweet_id=tweet_id, user_id=recipient_id)
+                .values_list('created_at', flat=True).first())
+    return timezone.now()
+
+
+def _count_actors(verb, recipient_id, tweet_id, window_start):
+    """Distinct actors still standing in the window; None if not derivable."""
+    window = {'created_at__gte': window_start, 'created_at__lt': window_start + coalesce_window()}
+    if verb == 'like':
+        return Like.objects.filter(tweet_id=tweet_id, **window).exclude(user_id=recipient_id).count()
+    if verb == 'follow':
+        return Follow.objects.filter(followee_id=recipient_id, **window).count()
+    return None
+
+
+def _latest_actor(verb, recipient_id, tweet_id):
+    if verb == 'like':
+        # Likes live on their likers' shards.
+        latest = scatter(Like.objects.filter(tweet_id=tweet_id).exclude(user_id=recipient_id)
+                         .order_by('-created_at').only('user_id', 'created_at'), 1)
+        return latest[0].user_id if latest else None
+    return (Follow.objects.filter(followee_id=recipient_id)
+            .order_by('-created_at').values_list('follower_id', flat=True).first())
@@ -0,0 +1,196 @@
+import base64
+from urllib.parse import parse_qsl, urlencode
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+from .models import Follow, TimelineEntry, Tweet, TweetScore
+from .sharding import scatter
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a descending composite key.
+
+    Every page is a ``WHERE key < cursor ORDER BY key DESC LIMIT n`` range
+    scan, so page cost does not depend on how deep the client has scrolled.
+    All fields in ``ordering`` are walked in descending order; the last one
+    must be unique (normally ``id``) to break ties.
+    """
+    ordering = ('created_at', 'id')
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.start(queryset.model, request)
+        queryset = self.seek(queryset, self.ordering)
+        return self.finish(scatter(queryset, self.page_size + 1))
+
+    def start(self, model, request):
+        self.page_size = self.get_page_size(request)
+        self.model = model
+        self.cursor = self.decode_cursor(request)
+        self.reverse = bool(self.cursor and self.cursor['reverse'])
+
+    def seek(self, queryset, fields):
+        """Restrict ``queryset`` to rows past the cursor, in walk order."""
+        if self.cursor:
+            queryset = queryset.filter(self.seek_filter(self.cursor['values'], fields))
+        if self.reverse:
+            return queryset.order_by(*fields)
+        return queryset.order_by(*['-' + field for field in fields])
+
+    def finish(self, rows):
+        """Trim the look-ahead row off ``rows`` and record which cursors exist."""
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+            self.has_next, self.has_prev = True, has_more
+        else:
+            self.has_next, self.has_prev = has_more, self.cursor is not None
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_cursor(),
+            'prev': self.get_prev_cursor(),
+            'results': data,
+        })
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    # --- Cursors ---
+
+    def get_next_cursor(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_prev_cursor(self):
+        if not self.has_prev or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def seek_filter(self, values, fields):
+        lookup = 'gt' if self.reverse else 'lt'
+        condition = Q()
+        for i, field in enumerate(fields):
+            term = Q(**{f'{field}__{lookup}': values[i]})
+            for prev_field, prev_value in zip(fields[:i], values[:i]):
+                term &= Q(**{prev_field: prev_value})
+            condition |= term
+        return condition
+
+    def get_cursor_values(self, obj):
+        return [getattr(obj, field) for field in self.ordering]
+
+    def encode_cursor(self, obj, reverse):
+        values = self.get_cursor_values(obj)
+        params = [('r', '1' if reverse else '0')]
+        params += [(field, _dump(value)) for field, value in zip(self.ordering, values)]
+        return base64.urlsafe_b64encode(urlencode(params).encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            params = dict(parse_qsl(base64.urlsafe_b64decode(encoded.encode()).decode(),
+                                    keep_blank_values=True))
+            values = [self.parse_cursor_value(field, params[field]) for field in self.ordering]
+            return {'reverse': params['r'] == '1', 'values': values}
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def parse_cursor_value(self, field, raw):
+        value = self.model._meta.get_field(field).to_python(raw)
+        if value is None:
+            raise ValueError(field)
+        return value
+
+
+def _dump(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+class TweetCursorPagination(KeysetPagination):
+    """Newest-first paging over ``Tweet(created_at, id)``."""
+    ordering = ('created_at', 'id')
+
+
+class HomeTimelinePagination(TweetCursorPagination):
+    """
+    Home timeline paging.
+
+    A page is one range scan over the owner's materialized ``TimelineEntry``
+    rows, merged with the newest tweets of any followed fan-out-on-read
+    authors (see ``tweet.timeline``). Cursors are the same ``(created_at, id)``
+    pairs used by the global list.
+    """
+
+    def paginate_timeline(self, user, request):
+        self.start(Tweet, request)
+        limit = self.page_size + 1
+
+        entries = self.seek(TimelineEntry.objects.filter(owner=user), ('created_at', 'tweet_id'))
+        keys = list(entries.values_list('created_at', 'tweet_id')[:limit])
+
+        pulled = list(Follow.objects.filter(
+            follower=user, followee__profile__fanout_on_read=True,
+        ).values_list('followee_id', flat=True))
+        if pulled:
+            tweets = self.seek(Tweet.objects.filter(user_id__in=pulled).only('id', 'created_at'), self.ordering)
+            keys += [(tweet.created_at, tweet.id) for tweet in scatter(tweets, limit)]
+            keys = sorted(set(keys), reverse=not self.reverse)[:limit]
+
+        by_id = Tweet.objects.in_bulk([pk for _, pk in keys])
+        return self.finish([by_id[pk] for _, pk in keys if pk in by_id])
+
+
+class SearchPagination(KeysetPagination):
+    """Best-match-first paging over ``(rank, id)`` from a ``tweet.search`` backend."""
+    ordering = ('search_rank', 'id')
+
+    def paginate_search(self, backend, query, request):
+        self.start(Tweet, request)
+        after = self.cursor['values'] if self.cursor else None
+        matches = backend.search(query, after=after, reverse=self.reverse, limit=self.page_size + 1)
+        by_id = Tweet.objects.in_bulk([pk for pk, _ in matches])
+        rows = []
+        for pk, rank in matches:
+            if pk in by_id:
+                by_id[pk].search_rank = rank
+                rows.append(by_id[pk])
+        return self.finish(rows)
+
+    def parse_cursor_value(self, field, raw):
+        if field == 'search_rank':
+            return float(raw)
+        return super().parse_cursor_value(field, raw)
+
+
+class RankedFeedPagination(KeysetPagination):
+    """Highest-score-first paging over the precomputed ``TweetScore`` index."""
+    ordering = ('score', 'tweet_id')
+
+    def paginate_ranked(self, request):
+        self.start(TweetScore, request)
+        scores = self.seek(TweetScore.objects.only('score', 'tweet_id'), self.ordering)
+        scores = self.finish(list(scores[:self.page_size + 1]))
+        by_id = Tweet.objects.in_bulk([row.tweet_id for row in scores])
+        return [by_id[row.tweet_id] for row in scores if row.tweet_id in by_id]
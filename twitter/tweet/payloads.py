@@ -0,0 +1,62 @@
+"""
+Cached tweet payloads.
+
+The viewer-independent part of a tweet (``TweetPayloadSerializer``) is cached
+under a key that includes ``updated_at``, loaded for a whole page with one
+``get_many`` and rebuilt only for the misses. Per-viewer and counter fields
+are merged on top from the row and the request's ``ViewerState``, and the
+author comes from the shared identity layer.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .identity import load_identities
+from .metrics import measure
+from .serializers import TweetPayloadSerializer
+
+
+def payload_timeout():
+    return getattr(settings, 'TWEET_PAYLOAD_CACHE_TIMEOUT', 300)
+
+
+# Bump when the cached payload shape changes.
+PAYLOAD_VERSION = 3
+
+
+def payload_key(tweet):
+    return f'tweet-payload:{PAYLOAD_VERSION}:{tweet.id}:{tweet.updated_at.timestamp()}'
+
+
+@measure('serialize')
+def serialize_tweets(tweets, context):
+    """Return ``TweetSerializer``-shaped dicts for ``tweets``, in order."""
+    tweets = list(tweets)
+    keys = {tweet.id: payload_key(tweet) for tweet in tweets}
+    payloads = cache.get_many(list(keys.values()))
+
+    missing = [tweet for tweet in tweets if keys[tweet.id] not in payloads]
+    if missing:
+        fresh = TweetPayloadSerializer(missing, many=True).data
+        fresh = {keys[tweet.id]: dict(data) for tweet, data in zip(missing, fresh)}
+        cache.set_many(fresh, payload_timeout())
+        payloads.update(fresh)
+
+    authors = load_identities(tweet.user_id for tweet in tweets)
+    viewer_state = context.get('viewer_state')
+    results = []
+    for tweet in tweets:
+        payload = payloads[keys[tweet.id]]
+        data = {'id': tweet.id, 'user': authors.get(tweet.user_id), **payload}
+        data['like_count'] = tweet.like_count
+        data['is_liked'] = viewer_state.is_liked(tweet) if viewer_state is not None else False
+        results.append(data)
+    return results
+
+
+def serialize_tweet(tweet, context):
+    return serialize_tweets([tweet], context)[0]
+
+
+def invalidate_tweet(tweet):
+    """Drop the cached payload for ``tweet`` as currently stored; call before saving or deleting."""
+    cache.delete(payload_key(tweet))
@@ -0,0 +1,142 @@
+"""
+On-demand profiling of single API requests.
+
+Views that mix in ``ProfilingMixin`` profile a request when profiling is
+enabled (``PROFILING_ENABLED``), the request asks for it with an
+``X-Profile: collapsed`` or ``X-Profile: pstats`` header, and the caller is
+staff or sends ``X-Profile-Token`` matching ``PROFILING_TOKEN``. Everything
+else pays one settings lookup.
+
+``collapsed`` runs a wall-clock stack sampler on a side thread and writes
+one ``frame;frame;frame count`` line per stack, ready for flamegraph.pl or
+speedscope. ``pstats`` runs ``cProfile`` and writes a file for
+``python -m pstats``. Output goes to ``PROFILING_DIR``, which keeps only
+the newest ``PROFILING_KEEP`` profiles; the file name is returned in the
+``X-Profile-Id`` response header.
+"""
+import cProfile
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.utils import timezone
+
+MODES = ('collapsed', 'pstats')
+
+
+def profiling_dir():
+    return getattr(settings, 'PROFILING_DIR', os.path.join(settings.BASE_DIR, 'profiles'))
+
+
+def requested_mode(request):
+    """The profile mode this request is entitled to, or None."""
+    if not getattr(settings, 'PROFILING_ENABLED', False):
+        return None
+    mode = request.headers.get('X-Profile')
+    if mode not in MODES:
+        return None
+    token = getattr(settings, 'PROFILING_TOKEN', '')
+    supplied = request.headers.get('X-Profile-Token', '')
+    if token and hmac.compare_digest(token.encode(), supplied.encode()):
+        return mode
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_staff:
+        return mode
+    return None
+
+
+class StackSampler:
+    """Sample one thread's stack every ``interval`` seconds from a side thread."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self._collapse(frame)] += 1
+
+    @staticmethod
+    def _collapse(frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+def _output_path(view, method, mode):
+    directory = profiling_dir()
+    os.makedirs(directory, exist_ok=True)
+    stamp = timezone.now().strftime('%Y%m%dT%H%M%S%f')
+    ext = 'txt' if mode == 'collapsed' else 'prof'
+    return os.path.join(directory, f'{stamp}-{view}-{method.lower()}.{ext}')
+
+
+def _trim(directory, keep):
+    """Keep the on-disk ring at its newest ``keep`` profiles."""
+    entries = sorted(
+        (entry for entry in os.scandir(directory) if entry.is_file()),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in entries[:max(0, len(entries) - keep)]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass  # trimmed concurrently
+
+
+def run_profiled(mode, view_name, method, func):
+    """Call ``func()`` under the profiler; return ``(result, file name, seconds)``."""
+    path = _output_path(view_name, method, mode)
+    started = time.perf_counter()
+    if mode == 'pstats':
+        profiler = cProfile.Profile()
+        result = profiler.runcall(func)
+        profiler.dump_stats(path)
+    else:
+        interval = getattr(settings, 'PROFILING_INTERVAL', 0.005)
+        with StackSampler(threading.get_ident(), interval) as sampler:
+            result = func()
+        sampler.dump(path)
+    _trim(os.path.dirname(path), getattr(settings, 'PROFILING_KEEP', 50))
+    return result, os.path.basename(path), time.perf_counter() - started
+
+
+class ProfilingMixin:
+    """Profile ``dispatch`` for requests that ask for it; see the module docstring."""
+
+    def dispatch(self, request, *args, **kwargs):
+        mode = requested_mode(request)
+        if mode is None:
+            return super().dispatch(request, *args, **kwargs)
+        response, name, elapsed = run_profiled(
+            mode, type(self).__name__, request.method,
+            lambda: super(ProfilingMixin, self).dispatch(request, *args, **kwargs),
+        )
+        response['X-Profile-Id'] = name
+        response['X-Profile-Duration'] = f'{elapsed * 1000:.1f}ms'
+        return response
@@ -0,0 +1,90 @@
+"""
+Engagement-ranked "For You" scores.
+
+A tweet's score is ``log10(max(likes, 1)) + age_term`` where the age term
+grows linearly with ``created_at``: every ``RANKING_DECAY_SECONDS`` of
+newer posting time is worth ten times the likes. Because the score does not
+depend on the current time, old scores stay comparable with new ones and
+``update_scores()`` only has to touch tweets that were posted or liked since
+its previous run (likes are counted from the ``Like`` table). Rows are
+timestamped before their transaction commits, and Snowflake ids from
+different workers do not arrive in order, so each run looks
+``RANKING_WATERMARK_OVERLAP`` seconds further back than the previous run
+started and upserts whatever it finds. Unlikes are picked up the next time
+the tweet is liked.
+"""
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from .models import Like, Tweet, TweetScore
+from .sharding import each_shard
+
+EPOCH = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def decay_seconds():
+    return getattr(settings, 'RANKING_DECAY_SECONDS', 45000)
+
+
+def watermark_overlap():
+    return timedelta(seconds=getattr(settings, 'RANKING_WATERMARK_OVERLAP', 300))
+
+
+def score(likes, created_at):
+    return math.log10(max(likes, 1)) + (created_at - EPOCH).total_seconds() / decay_seconds()
+
+
+def update_scores(batch_size=1000):
+    """Rescore tweets posted or liked since the last run; return how many."""
+    started = timezone.now()
+    last_run = TweetScore.objects.aggregate(last_run=Max('computed_at'))['last_run']
+    since = last_run - watermark_overlap() if last_run is not None else None
+    updated = 0
+
+    # Tweets posted since the watermark, in (created_at, id) order, shard by shard.
+    for tweets in each_shard(Tweet.objects.all()):
+        if since is not None:
+            tweets = tweets.filter(created_at__gte=since)
+        after = None
+        while True:
+            page = tweets.order_by('created_at', 'id')
+            if after is not None:
+                page = page.filter(Q(created_at__gt=after[0]) | Q(created_at=after[0], id__gt=after[1]))
+            keys = list(page.values_list('created_at', 'id')[:batch_size])
+            if not keys:
+                break
+            updated += _rescore([pk for _, pk in keys], started)
+            after = keys[-1]
+
+    # Older tweets that picked up likes since the watermark.
+    if since is not None:
+        for likes in each_shard(Like.objects.all()):
+            liked = likes.filter(created_at__gte=since).values_list('tweet_id', flat=True).distinct()
+            batch = []
+            for tweet_id in liked.iterator(chunk_size=batch_size):
+                batch.append(tweet_id)
+                if len(batch) == batch_size:
+                    updated += _rescore(batch, started)
+                    batch = []
+            if batch:
+                updated += _rescore(batch, started)
+    return updated
+
+
+def _rescore(tweet_ids, computed_at):
+    likes = {}
+    for shard_likes in each_shard(Like.objects.filter(tweet_id__in=tweet_ids)):
+        for pk, n in shard_likes.values('tweet_id').annotate(n=Count('id')).values_list('tweet_id', 'n'):
+            likes[pk] = likes.get(pk, 0) + n
+    rows = [
+        TweetScore(tweet_id=pk, score=score(likes.get(pk, 0), tweet.created_at), computed_at=computed_at)
+        for pk, tweet in Tweet.objects.only('id', 'created_at').in_bulk(tweet_ids).items()
+    ]
+    TweetScore.objects.bulk_create(
+        rows, update_conflicts=True, unique_fields=['tweet'], update_fields=['score', 'computed_at'],
+    )
+    return len(rows)
@@ -0,0 +1,141 @@
+"""
+Real-time push over Server-Sent Events.
+
+Writers call ``publish_on_commit()`` from ordinary sync code; connected
+clients hold an ``/api/stream/`` response open under the ASGI app and receive
+events from the broker named by ``REALTIME_BROKER``.
+
+``InProcessBroker`` fans events out to subscribers in the same process and
+keeps a short history so a reconnecting client can resume from its
+``Last-Event-ID``. Multi-process deployments plug in a broker backed by a
+shared pub/sub service with the same ``publish``/``subscribe`` interface.
+"""
+import asyncio
+import json
+import threading
+import uuid
+from collections import deque
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+@dataclass(frozen=True)
+class Event:
+    id: str
+    channel: str
+    data: dict
+
+
+class Subscription:
+    """One client's view of a set of channels, consumed on the event loop."""
+
+    def __init__(self, broker, channels, maxsize):
+        self.broker = broker
+        self.channels = frozenset(channels)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow client: end the stream and let it resume from history.
+            self.overflowed = True
+
+    async def get(self, timeout):
+        """Next event, or None if nothing arrived within ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    def __init__(self, history_size=1000, queue_size=100):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.queue_size = queue_size
+        self._seq = 0
+        self._history = deque(maxlen=history_size)
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel, data):
+        with self._lock:
+            self._seq += 1
+            event = Event(f'{self.epoch}-{self._seq}', channel, data)
+            self._history.append((self._seq, event))
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                subscription.close()  # its event loop is gone
+        return event
+
+    def subscribe(self, channels, last_event_id=None):
+        """Register on the running loop, replaying history after ``last_event_id``."""
+        subscription = Subscription(self, channels, self.queue_size)
+        after = self._parse_event_id(last_event_id)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+            backlog = [] if after is None else [
+                event for seq, event in self._history
+                if seq > after and event.channel in subscription.channels
+            ]
+        for event in backlog:
+            subscription.deliver(event)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def subscriber_count(self):
+        with self._lock:
+            return len({s for subscribers in self._subscribers.values() for s in subscribers})
+
+    def _parse_event_id(self, event_id):
+        # Ids from another process or an earlier run cannot be resumed.
+        epoch, _, seq = (event_id or '').partition('-')
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                backend = getattr(settings, 'REALTIME_BROKER', 'tweet.realtime.InProcessBroker')
+                _broker = import_string(backend)(**getattr(settings, 'REALTIME_BROKER_OPTIONS', {}))
+    return _broker
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def publish_on_commit(channel, data):
+    transaction.on_commit(lambda: get_broker().publish(channel, data))
+
+
+def format_event(event):
+    return f'id: {event.id}\nevent: {event.data.get("type", "message")}\ndata: {json.dumps(event.data)}\n\n'
@@ -0,0 +1,202 @@
+"""
+Retention and chunked deletion.
+
+Read notifications older than ``NOTIFICATION_RETENTION_DAYS`` (and any
+older than ``NOTIFICATION_MAX_AGE_DAYS``) are removed by
+``expire_notifications()``, run from ``manage.py expire_notifications``. It
+walks each shard in id order, ``RETENTION_BATCH_SIZE`` rows per short
+transaction with ``RETENTION_BATCH_PAUSE`` seconds between batches, and can
+append every removed row to a gzipped JSON Lines archive first.
+
+Deleting a tweet or a user removes only that row. Its likes,
+notifications, follows, timeline entries, mentions and links are not
+cascaded in the request; ``purge_tweet`` and ``purge_user`` run as
+background tasks that each delete one bounded batch per table, fix the
+counters that depended on those rows, and reschedule themselves until
+nothing is left. The rows may live on other shards, so cascades could not
+be done by the database anyway.
+"""
+import gzip
+import json
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import stats
+from .entities import uncount_trends
+from .models import (
+    Follow, Like, Mention, Notification, TimelineEntry, Tweet, TweetHashtag, TweetScore, UserProfile,
+)
+from .notifications import unread_key
+from .sharding import each_shard
+from .tasks import enqueue
+
+ARCHIVED_FIELDS = ('id', 'recipient_id', 'actor_id', 'verb', 'tweet_id', 'actor_count',
+                   'window_start', 'created_at')
+
+
+def batch_size():
+    return getattr(settings, 'RETENTION_BATCH_SIZE', 1000)
+
+
+def batch_pause():
+    return getattr(settings, 'RETENTION_BATCH_PAUSE', 0.05)
+
+
+def retention_days():
+    return getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 30)
+
+
+def max_age_days():
+    return getattr(settings, 'NOTIFICATION_MAX_AGE_DAYS', 365)
+
+
+# --- Notification retention ---
+
+class Archive:
+    """Append-only gzipped JSON Lines file, opened on first write."""
+
+    def __init__(self, directory, name):
+        self.path = os.path.join(directory, name)
+        self.file = None
+
+    def write(self, rows):
+        if self.file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.file = gzip.open(self.path, 'at', encoding='utf-8')
+        for row in rows:
+            self.file.write(json.dumps(row, default=str) + '\n')
+        self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def expire_notifications(archive=None, now=None, dry_run=False):
+    """Remove expired notifications batch by batch; return how many."""
+    now = now or timezone.now()
+    read_cutoff = now - timedelta(days=retention_days())
+    hard_cutoff = now - timedelta(days=max_age_days())
+    removed = 0
+    for notifications in each_shard(Notification.objects.filter(created_at__lt=read_cutoff)):
+        after_id = 0
+        while True:
+            rows = list(notifications.filter(id__gt=after_id).order_by('id')
+                        .values(*ARCHIVED_FIELDS)[:batch_size()])
+            if not rows:
+                break
+            after_id = rows[-1]['id']
+            expired = _expired(rows, hard_cutoff)
+            if expired and not dry_run:
+                if archive is not None:
+                    archive.write(expired)
+                with transaction.atomic(using=notifications.db):
+                    notifications.filter(id__in=[row['id'] for row in expired]).delete()
+                # Unread rows past the hard cutoff were counted as unread.
+                cache.delete_many([unread_key(row['recipient_id']) for row in expired])
+            removed += len(expired)
+            if len(rows) < batch_size():
+                break
+            time.sleep(batch_pause())
+    return removed
+
+
+def _expired(rows, hard_cutoff):
+    watermarks = dict(UserProfile.objects.filter(user_id__in={row['recipient_id'] for row in rows})
+                      .values_list('user_id', 'notifications_read_at'))
+    expired = []
+    for row in rows:
+        read_at = watermarks.get(row['recipient_id'])
+        if row['created_at'] < hard_cutoff or (read_at is not None and row['created_at'] <= read_at):
+            expired.append(row)
+    return expired
+
+
+# --- Chunked deletion ---
+
+def _delete_batch(queryset):
+    """Delete up to one batch of ``queryset``; return True if more may remain."""
+    size = batch_size()
+    ids = list(queryset.values_list('pk', flat=True)[:size])
+    if ids:
+        queryset.filter(pk__in=ids).delete()
+    return len(ids) == size
+
+
+def _delete_notifications(notifications):
+    """``_delete_batch`` for notifications, also dropping the recipients' cached unread counts."""
+    size = batch_size()
+    rows = list(notifications.values_list('id', 'recipient_id')[:size])
+    if rows:
+        notifications.filter(id__in=[pk for pk, _ in rows]).delete()
+        # Unread rows were counted; the next read recounts.
+        cache.delete_many(list({unread_key(recipient_id) for _, recipient_id in rows}))
+    return len(rows) == size
+
+
+def purge_tweet(tweet_id):
+    """Delete one batch of a deleted tweet's dependent rows; reschedule until done."""
+    remaining = False
+    for likes in each_shard(Like.objects.filter(tweet_id=tweet_id)):
+        batch = list(likes.values_list('id', 'user_id')[:batch_size()])
+        if batch:
+            likes.filter(id__in=[pk for pk, _ in batch]).delete()
+            UserProfile.objects.filter(user_id__in=[user_id for _, user_id in batch]).update(
+                likes_count=F('likes_count') - 1)
+            remaining |= len(batch) == batch_size()
+    for notifications in each_shard(Notification.objects.filter(tweet_id=tweet_id)):
+        remaining |= _delete_notifications(notifications)
+    links = TweetHashtag.objects.filter(tweet_id=tweet_id)
+    batch = list(links.values_list('id', 'hashtag_id', 'created_at')[:batch_size()])
+    if batch:
+        links.filter(id__in=[pk for pk, _, _ in batch]).delete()
+        # Links carry the tweet's created_at, which picks the trend bucket.
+        uncount_trends([hashtag_id for _, hashtag_id, _ in batch], batch[0][2])
+        remaining |= len(batch) == batch_size()
+    for model in (TimelineEntry, Mention):
+        remaining |= _delete_batch(model.objects.filter(tweet_id=tweet_id))
+    TweetScore.objects.filter(tweet_id=tweet_id).delete()
+    if remaining:
+        enqueue(purge_tweet, tweet_id)
+
+
+def purge_user(user_id):
+    """Delete one batch of each kind of a deleted user's rows; reschedule until done."""
+    size = batch_size()
+    remaining = False
+
+    # Each deleted tweet schedules its own purge_tweet (see signals).
+    for tweets in each_shard(Tweet.objects.for_user(user_id).filter(user_id=user_id)):
+        remaining |= _delete_batch(tweets)
+
+    for likes in each_shard(Like.objects.for_user(user_id).filter(user_id=user_id)):
+        batch = list(likes.values_list('id', 'tweet_id')[:size])
+        if batch:
+            likes.filter(id__in=[pk for pk, _ in batch]).delete()
+            Tweet.objects.filter(pk__in=[tweet_id for _, tweet_id in batch]).update(like_count=F('like_count') - 1)
+            remaining |= len(batch) == size
+
+    for notifications in each_shard(Notification.objects.for_user(user_id).filter(recipient_id=user_id)):
+        remaining |= _delete_notifications(notifications)
+    for notifications in each_shard(Notification.objects.filter(actor_id=user_id)):
+        remaining |= _delete_notifications(notifications)
+
+    for side in ('follower_id', 'followee_id'):
+        follows = Follow.objects.filter(**{side: user_id})
+        edges = list(follows.values_list('id', 'follower_id', 'followee_id')[:size])
+        if edges:
+            follows.filter(id__in=[pk for pk, _, _ in edges]).delete()
+            stats.follows_removed([(follower, followee) for _, follower, followee in edges])
+            remaining |= len(edges) == size
+
+    remaining |= _delete_batch(TimelineEntry.objects.filter(owner_id=user_id))
+    remaining |= _delete_batch(Mention.objects.filter(user_id=user_id))
+    if remaining:
+        enqueue(purge_user, user_id)
@@ -0,0 +1,98 @@
+"""
+Database routing: user-keyed shards, and read/write splitting with
+read-your-writes.
+
+``ShardRouter`` places instances of sharded models (see tweet/sharding.py)
+on their owner's shard, and keeps this app's data migrations off shards
+other than ``default``; it has no opinion on anything else.
+
+Writes always go to ``default``. ``tweet.middleware.ReplicaMiddleware``
+marks a request as replica-safe when it is a read (GET/HEAD/OPTIONS) and
+the client has not written recently; only then does ``ReplicaRouter`` send
+its reads to one of ``REPLICA_DATABASES``. Everything else — writes, reads in the same request
+as a write, background tasks and management commands — reads from the
+primary.
+
+After a successful write the middleware sets a cookie that pins the
+client's reads to the primary for ``REPLICA_PIN_SECONDS``, long enough to
+outlast replication lag, so users always see their own tweets and likes.
+"""
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from . import sharding
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_aliases():
+    return getattr(settings, 'REPLICA_DATABASES', [])
+
+
+def pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+
+
+def pin_cookie():
+    return getattr(settings, 'REPLICA_PIN_COOKIE', 'db_primary_until')
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    token = _use_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class ShardRouter:
+    def _shard(self, model, instance=None, **hints):
+        if instance is None or not isinstance(instance, sharding.ShardedModelMixin):
+            return None
+        if not isinstance(instance, model) or not sharding.is_sharded():
+            return None
+        return sharding.shard_of(instance)
+
+    db_for_read = db_for_write = _shard
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Data migrations (no model_name) backfill rows from before sharding,
+        # which are all on default; a new shard has nothing to backfill.
+        if app_label == 'tweet' and model_name is None and db != 'default' and db in sharding.shard_databases():
+            return False
+        return None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        aliases = replica_aliases()
+        if aliases and _use_replica.get():
+            return random.choice(aliases)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # all aliases hold the same data
+
+
+def is_pinned(request):
+    try:
+        return float(request.COOKIES.get(pin_cookie(), 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def pin(response):
+    """Send this client's reads to the primary for the next ``REPLICA_PIN_SECONDS``."""
+    seconds = pin_seconds()
+    response.set_cookie(pin_cookie(), f'{time.time() + seconds:.0f}', max_age=seconds,
+                        httponly=True, samesite='Lax')
@@ -0,0 +1,115 @@
+"""
+Full-text tweet search.
+
+Tweet text is indexed in a side table created by migration 0010: an FTS5
+virtual table on SQLite, and a ``tsvector`` column with a GIN index on
+PostgreSQL. Both backends return ``(tweet_id, rank)`` pairs, best match
+first with higher rank, and seek past a ``(rank, tweet_id)`` cursor, so
+``SearchPagination`` can page through results like any other keyset.
+
+The index is kept current by ``schedule_reindex()``. It re-reads the tweet
+in a background task and indexes or removes it, whichever is current, so
+create, edit and delete share one code path.
+"""
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+
+from .models import Tweet
+from .tasks import enqueue
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class SQLiteFTSBackend:
+    table = 'tweet_search'
+
+    def index(self, rows):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {self.table}(rowid, text) VALUES (%s, %s)', rows)
+
+    def remove(self, tweet_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [(pk,) for pk in tweet_ids])
+
+    def search(self, query, after=None, reverse=False, limit=20):
+        tokens = TOKEN_RE.findall(query)
+        if not tokens:
+            return []
+        match = ' '.join('"%s"' % token for token in tokens)
+        sql = (f'SELECT tweet_id, rank FROM ('
+               f'SELECT rowid AS tweet_id, -bm25({self.table}) AS rank '
+               f'FROM {self.table} WHERE {self.table} MATCH %s)')
+        params = [match]
+        return _seek(sql, params, after, reverse, limit)
+
+
+class PostgresBackend:
+    table = 'tweet_search'
+    config = 'english'
+
+    def index(self, rows):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {self.table} (tweet_id, document) '
+                f'VALUES (%s, to_tsvector(%s::regconfig, %s)) '
+                f'ON CONFLICT (tweet_id) DO UPDATE SET document = EXCLUDED.document',
+                [(pk, self.config, text) for pk, text in rows])
+
+    def remove(self, tweet_ids):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE tweet_id = ANY(%s)', [list(tweet_ids)])
+
+    def search(self, query, after=None, reverse=False, limit=20):
+        if not query.strip():
+            return []
+        sql = (f'SELECT tweet_id, rank FROM ('
+               f'SELECT tweet_id, ts_rank(document, q)::float8 AS rank '
+               f'FROM {self.table}, websearch_to_tsquery(%s::regconfig, %s) q '
+               f'WHERE document @@ q) matches')
+        params = [self.config, query]
+        return _seek(sql, params, after, reverse, limit)
+
+
+def _seek(sql, params, after, reverse, limit):
+    params = list(params)
+    if after is not None:
+        op = '>' if reverse else '<'
+        rank, tweet_id = after
+        sql += f' WHERE rank {op} %s OR (rank = %s AND tweet_id {op} %s)'
+        params += [rank, rank, tweet_id]
+    direction = 'ASC' if reverse else 'DESC'
+    sql += f' ORDER BY rank {direction}, tweet_id {direction} LIMIT %s'
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+BACKENDS = {
+    'sqlite': SQLiteFTSBackend,
+    'postgresql': PostgresBackend,
+}
+
+
+def get_backend():
+    try:
+        return BACKENDS[connection.vendor]()
+    except KeyError:
+        raise ImproperlyConfigured(f'Tweet search does not support the {connection.vendor} backend.')
+
+
+def reindex_tweet(tweet_id):
+    text = Tweet.objects.for_id(tweet_id).filter(pk=tweet_id).values_list('text', flat=True).first()
+    backend = get_backend()
+    if text is None:
+        backend.remove([tweet_id])
+    else:
+        backend.index([(tweet_id, text)])
+
+
+def schedule_reindex(tweet_id):
+    enqueue(reindex_tweet, tweet_id)
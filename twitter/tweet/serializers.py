@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from .media import stage_photo
 from .models import Tweet, Like, Notification, UserProfile
 
 
@@ -22,66 +23,100 @@ class UserMiniSerializer(serializers.ModelSerializer):
         return ''
 
 
-class TweetSerializer(serializers.ModelSerializer):
-    user = UserMiniSerializer(read_only=True)
-    like_count = serializers.IntegerField(read_only=True, default=0)
-    is_liked = serializers.SerializerMethodField()
+class TweetPayloadSerializer(serializers.ModelSerializer):
+    """
+    Viewer-independent, tweet-owned part of ``TweetSerializer``; safe to cache
+    per tweet. The author is hydrated separately through ``tweet.identity``.
+    """
     photo_url = serializers.SerializerMethodField()
+    photo_thumb_url = serializers.SerializerMethodField()
 
     class Meta:
         model = Tweet
-        fields = ['id', 'user', 'text', 'photo_url', 'created_at', 'updated_at', 'like_count', 'is_liked']
+        fields = ['id', 'text', 'photo_url', 'photo_thumb_url', 'photo_status', 'created_at', 'updated_at']
+
+    def get_photo_url(self, obj):
+        return obj.photo_url or None
+
+    def get_photo_thumb_url(self, obj):
+        return obj.photo_thumb_url or None
+
+
+class TweetSerializer(TweetPayloadSerializer):
+    user = UserMiniSerializer(read_only=True)
+    like_count = serializers.IntegerField(read_only=True, default=0)
+    is_liked = serializers.SerializerMethodField()
+
+    class Meta(TweetPayloadSerializer.Meta):
+        fields = ['id', 'user', 'text', 'photo_url', 'photo_thumb_url', 'photo_status',
+                  'created_at', 'updated_at', 'like_count', 'is_liked']
 
     def get_is_liked(self, obj):
+        viewer_state = self.context.get('viewer_state')
+        if viewer_state is not None:
+            return viewer_state.is_liked(obj)
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return obj.likes.filter(user=request.user).exists()
+            return Like.objects.for_user(request.user.id).filter(user=request.user, tweet=obj).exists()
         return False
 
-    def get_photo_url(self, obj):
-        if obj.photo:
-            return obj.photo.url
-        return None
-
 
 class TweetCreateSerializer(serializers.ModelSerializer):
+    # Validated here, but stored and uploaded out of band by tweet.media.
+    photo = serializers.ImageField(write_only=True, required=False)
+
     class Meta:
         model = Tweet
         fields = ['text', 'photo']
 
+    def save(self, **kwargs):
+        photo = self.validated_data.pop('photo', None)
+        tweet = super().save(**kwargs)
+        stage_photo(tweet, photo)
+        return tweet
+
 
 class UserProfileSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
     email = serializers.CharField(source='user.email', read_only=True)
     date_joined = serializers.DateTimeField(source='user.date_joined', read_only=True)
-    tweet_count = serializers.SerializerMethodField()
-    like_count = serializers.SerializerMethodField()
+    tweet_count = serializers.IntegerField(source='tweets_count', read_only=True)
+    like_count = serializers.IntegerField(source='likes_count', read_only=True)
 
     class Meta:
         model = UserProfile
         fields = ['id', 'username', 'email', 'display_name', 'bio', 'avatar_url',
-                  'header_url', 'location', 'website', 'date_joined', 'tweet_count', 'like_count']
-
-    def get_tweet_count(self, obj):
-        return obj.user.tweets.count()
-
-    def get_like_count(self, obj):
-        return obj.user.likes.count()
+                  'header_url', 'location', 'website', 'date_joined', 'tweet_count', 'like_count',
+                  'followers_count', 'following_count']
+        read_only_fields = ['followers_count', 'following_count']
 
 
 class NotificationSerializer(serializers.ModelSerializer):
-    actor = UserMiniSerializer(read_only=True)
+    actor = serializers.SerializerMethodField()
     tweet_text = serializers.SerializerMethodField()
+    is_read = serializers.SerializerMethodField()
 
     class Meta:
         model = Notification
-        fields = ['id', 'actor', 'verb', 'tweet', 'tweet_text', 'is_read', 'created_at']
+        fields = ['id', 'actor', 'actor_count', 'verb', 'tweet', 'tweet_text', 'is_read', 'created_at']
+
+    def get_actor(self, obj):
+        identities = self.context.get('identities')
+        if identities is not None:
+            return identities.get(obj.actor_id)
+        return UserMiniSerializer(obj.actor).data
 
     def get_tweet_text(self, obj):
-        if obj.tweet:
-            return obj.tweet.text[:80]
+        tweets = self.context.get('tweets')
+        tweet = tweets.get(obj.tweet_id) if tweets is not None else obj.tweet
+        if tweet:
+            return tweet.text[:80]
         return None
 
+    def get_is_read(self, obj):
+        read_at = self.context.get('read_at')
+        return read_at is not None and obj.created_at <= read_at
+
 
 class RegisterSerializer(serializers.Serializer):
     username = serializers.CharField(max_length=150)
@@ -99,5 +134,4 @@ class RegisterSerializer(serializers.Serializer):
             email=validated_data.get('email', ''),
             password=validated_data['password'],
         )
-        UserProfile.objects.get_or_create(user=user)
         return user
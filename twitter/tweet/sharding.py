@@ -0,0 +1,378 @@
+"""
+User-keyed horizontal sharding for ``Tweet``, ``Like`` and ``Notification``.
+
+Each sharded model names its owner column in ``SHARD_KEY`` (the author, the
+liker, the recipient). An owner maps to one of ``SHARD_COUNT`` logical
+shards, and ``SHARD_MAP`` (default: round robin over ``SHARD_DATABASES``)
+maps logical shards to database aliases, so shards can be split or moved
+later by editing the map, not by rehashing rows.
+
+With a single shard (the default) rows keep auto-increment ids. Once
+there are more, new rows get Snowflake-style ids that fit in 53 bits, so
+they survive JavaScript numbers::
+
+    | 38 bits: 10 ms ticks since EPOCH | 6: logical shard | 4: worker | 5: sequence |
+
+They increase with time, so ``(created_at, id)`` cursors keep working, and
+the logical shard is read back from the id, so a tweet is found from its id
+alone. Auto-increment ids stay far below any Snowflake id and those rows
+live on ``default``.
+
+Two processes must never issue ids with the same worker bits. Each one
+leases a worker id (0-15) from the default cache, which must therefore be
+shared (Redis, Memcached), and renews it while it runs; a process that
+finds none free refuses to issue ids. ``SNOWFLAKE_WORKER_ID`` restricts the
+lease to that one id. Web processes claim theirs at startup (see
+twitter/asgi.py).
+
+``ShardedQuerySet`` does the routing where the rows say where they belong:
+``create`` goes to the owner's shard, ``bulk_create`` and ``in_bulk`` split
+by shard, ``update``, ``delete``, ``count``, ``exists`` and
+``get_or_create`` run on every shard the query spans, and ``for_id`` pins a
+query to one shard. ``for_user`` spans the owner's shard and, while
+``SHARD_LEGACY_ROWS`` is set, ``default``, which keeps their rows from
+before sharding. Other reads of a spanning query go through ``each_shard()``
+or ``scatter()``; iterating one directly only reads ``default``. Writes
+that touch several databases use ``transactions()``. With a single shard
+(the default) all of this reduces to plain querysets on the usual router.
+"""
+import heapq
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone as dt_timezone
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models, transaction
+
+EPOCH = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+TICK_MS = 10
+SHARD_BITS = 6
+WORKER_BITS = 4
+SEQUENCE_BITS = 5
+SHARD_COUNT = 1 << SHARD_BITS
+
+# Auto-increment ids issued while unsharded; any Snowflake id is larger.
+LEGACY_ID_LIMIT = 1 << (SHARD_BITS + WORKER_BITS + SEQUENCE_BITS + 18)
+
+# Worker id leases are renewed once a third of this has passed.
+LEASE_SECONDS = 60
+
+
+def shard_databases():
+    return getattr(settings, 'SHARD_DATABASES', ['default'])
+
+
+def is_sharded():
+    return len(shard_databases()) > 1
+
+
+def legacy_rows():
+    """Whether ``default`` may still hold sharded-model rows from before sharding."""
+    return getattr(settings, 'SHARD_LEGACY_ROWS', True)
+
+
+def worker_candidates():
+    configured = getattr(settings, 'SNOWFLAKE_WORKER_ID', None)
+    if configured is None:
+        return range(1 << WORKER_BITS)
+    if not 0 <= int(configured) < 1 << WORKER_BITS:
+        raise ImproperlyConfigured(f'SNOWFLAKE_WORKER_ID must be between 0 and {(1 << WORKER_BITS) - 1}.')
+    return [int(configured)]
+
+
+# --- Shard map ---
+
+def logical_shard(user_id):
+    return user_id % SHARD_COUNT
+
+
+def database_for(logical):
+    mapping = getattr(settings, 'SHARD_MAP', None)
+    if mapping:
+        return mapping[logical]
+    databases = shard_databases()
+    return databases[logical % len(databases)]
+
+
+def shard_for_user(user_id):
+    return database_for(logical_shard(user_id))
+
+
+def shard_for_id(object_id):
+    if object_id < LEGACY_ID_LIMIT:
+        return 'default'
+    return database_for((object_id >> (WORKER_BITS + SEQUENCE_BITS)) & (SHARD_COUNT - 1))
+
+
+# --- Ids ---
+
+def _lease_key(worker):
+    return f'snowflake:worker:{worker}'
+
+
+def lease_worker_id(token):
+    """Claim a worker id no live process holds, or raise ImproperlyConfigured."""
+    candidates = worker_candidates()
+    for worker in candidates:
+        if cache.add(_lease_key(worker), token, LEASE_SECONDS):
+            return worker
+    raise ImproperlyConfigured(
+        f'No free Snowflake worker id among {list(candidates)}; another process holds '
+        f'each of them. Run fewer inserting processes or free SNOWFLAKE_WORKER_ID.')
+
+
+class IdGenerator:
+    """Per-process Snowflake source; up to 32 ids per tick per logical shard."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.token = f'{socket.gethostname()}:{self.pid}:{uuid.uuid4().hex[:8]}'
+        self.worker = None
+        self.leased_until = 0.0  # by our clock; the cache entry lives at least this long
+        self.lock = threading.Lock()
+        self.last = {}  # logical shard -> (tick, sequence)
+
+    def hold_lease(self):
+        """Renew the worker id lease, or lease a new one if ours is nearly or already gone."""
+        now = time.time()
+        if now < self.leased_until - LEASE_SECONDS * 2 / 3:
+            return
+        key = _lease_key(self.worker)
+        # Renew only with a third of the lease to spare, so it cannot lapse
+        # between the check and the touch.
+        if (self.worker is not None and now < self.leased_until - LEASE_SECONDS / 3
+                and cache.get(key) == self.token and cache.touch(key, LEASE_SECONDS)):
+            self.leased_until = now + LEASE_SECONDS
+            return
+        self.worker = lease_worker_id(self.token)
+        self.leased_until = now + LEASE_SECONDS
+
+    def next_id(self, logical):
+        with self.lock:
+            self.hold_lease()
+            tick = _tick()
+            last_tick, sequence = self.last.get(logical, (-1, 0))
+            if tick < last_tick:
+                tick = last_tick  # clock stepped back; stay monotonic
+            if tick == last_tick:
+                sequence += 1
+                if sequence >> SEQUENCE_BITS:
+                    while tick <= last_tick:
+                        time.sleep(TICK_MS / 1000 / 4)
+                        tick = _tick()
+                    sequence = 0
+            else:
+                sequence = 0
+            self.last[logical] = (tick, sequence)
+        return (((tick << SHARD_BITS | logical) << WORKER_BITS | self.worker) << SEQUENCE_BITS) | sequence
+
+
+def _tick():
+    return int((time.time() - EPOCH.timestamp()) * 1000) // TICK_MS
+
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def generator():
+    """This process's IdGenerator; a forked child gets its own, with its own lease."""
+    global _generator
+    if _generator is None or _generator.pid != os.getpid():
+        with _generator_lock:
+            if _generator is None or _generator.pid != os.getpid():
+                _generator = IdGenerator()
+    return _generator
+
+
+def claim_worker_id():
+    """Lease a worker id now if sharded, so a clash stops the process at startup."""
+    if is_sharded():
+        with generator().lock:
+            generator().hold_lease()
+
+
+def next_id(logical):
+    return generator().next_id(logical)
+
+
+def assign_id(instance):
+    """Give a new sharded-model row its Snowflake id; unsharded rows auto-increment."""
+    if instance.pk is None and is_sharded():
+        instance.pk = next_id(logical_shard(getattr(instance, instance.SHARD_KEY)))
+
+
+def shard_of(instance):
+    assign_id(instance)
+    return shard_for_id(instance.pk)
+
+
+# --- Querysets ---
+
+def _group(items, key):
+    groups = {}
+    for item in items:
+        groups.setdefault(key(item), []).append(item)
+    return groups
+
+
+class ShardedQuerySet(models.QuerySet):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._aliases = None  # shards this query spans when not pinned; None for all
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._aliases = self._aliases
+        return clone
+
+    def aliases(self):
+        """The databases this queryset's rows may be on."""
+        if self._db is not None:
+            return [self._db]
+        return self._aliases or shard_databases()
+
+    def for_user(self, user_id):
+        """Rows owned by ``user_id``: their shard, plus ``default`` for rows from before sharding."""
+        if not is_sharded():
+            return self
+        shard = shard_for_user(user_id)
+        if shard == 'default' or not legacy_rows():
+            return self.using(shard)
+        clone = self._chain()
+        clone._aliases = [shard, 'default']
+        return clone
+
+    def for_id(self, object_id):
+        return self.using(shard_for_id(object_id)) if is_sharded() else self
+
+    def _spans_shards(self):
+        return len(self.aliases()) > 1
+
+    def create(self, **kwargs):
+        if not self._spans_shards():
+            return super().create(**kwargs)
+        obj = self.model(**kwargs)
+        obj.save(force_insert=True, using=shard_of(obj))
+        return obj
+    create.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            assign_id(obj)
+        if not self._spans_shards():
+            return super().bulk_create(objs, *args, **kwargs)
+        for alias, group in _group(objs, lambda obj: shard_for_id(obj.pk)).items():
+            self.using(alias).bulk_create(group, *args, **kwargs)
+        return objs
+    bulk_create.alters_data = True
+
+    def in_bulk(self, id_list=None, *, field_name='pk'):
+        if id_list is None or field_name != 'pk' or not self._spans_shards():
+            return super().in_bulk(id_list, field_name=field_name)
+        found = {}
+        for alias, ids in _group(set(id_list), shard_for_id).items():
+            found.update(self.using(alias).in_bulk(ids))
+        return found
+
+    def get_or_create(self, defaults=None, **kwargs):
+        """Look on every shard spanned; create on the new row's own shard."""
+        if not self._spans_shards():
+            return super().get_or_create(defaults, **kwargs)
+        home = shard_of(self.model(**kwargs))
+        for alias in self.aliases():
+            if alias != home:
+                found = self.using(alias).filter(**kwargs).first()
+                if found is not None:
+                    return found, False
+        return self.using(home).get_or_create(defaults, **kwargs)
+    get_or_create.alters_data = True
+
+    def update(self, **kwargs):
+        if not self._spans_shards():
+            return super().update(**kwargs)
+        return sum(self.using(alias).update(**kwargs) for alias in self.aliases())
+    update.alters_data = True
+
+    def delete(self):
+        if not self._spans_shards():
+            return super().delete()
+        total, per_model = 0, {}
+        for alias in self.aliases():
+            count, counts = self.using(alias).delete()
+            total += count
+            for label, n in counts.items():
+                per_model[label] = per_model.get(label, 0) + n
+        return total, per_model
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def count(self):
+        if not self._spans_shards():
+            return super().count()
+        return sum(self.using(alias).count() for alias in self.aliases())
+
+    def exists(self):
+        if not self._spans_shards():
+            return super().exists()
+        return any(self.using(alias).exists() for alias in self.aliases())
+
+
+class ShardedModelMixin:
+    """Give new rows a Snowflake id for their owner's logical shard on save, when sharded."""
+    SHARD_KEY = 'user_id'
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.pk is None and is_sharded():
+            assign_id(self)
+            kwargs.setdefault('force_insert', True)
+        super().save(*args, **kwargs)
+
+
+def each_shard(queryset):
+    """``queryset`` once per shard, for reads that must see every row."""
+    if not isinstance(queryset, ShardedQuerySet) or not queryset._spans_shards():
+        return [queryset]
+    return [queryset.using(alias) for alias in queryset.aliases()]
+
+
+@contextmanager
+def transactions(*aliases):
+    """
+    A transaction on each of ``aliases`` and on ``default``. They commit one
+    after another, so this is not atomic across databases: if a later commit
+    fails, the earlier ones stand.
+
+    ``default`` is entered first, so it commits last: tasks enqueued inside
+    (which wait for default's commit, see tweet.tasks) start only once every
+    database here has committed.
+    """
+    with ExitStack() as stack:
+        for alias in dict.fromkeys(('default', *aliases)):
+            stack.enter_context(transaction.atomic(using=alias))
+        yield
+
+
+def scatter(queryset, limit):
+    """
+    First ``limit`` rows of an ordered ``queryset`` of model instances,
+    gathered from every shard and merged in the queryset's order (all
+    ``order_by`` fields must run in the same direction).
+    """
+    if not isinstance(queryset, ShardedQuerySet) or not queryset._spans_shards():
+        return list(queryset[:limit])
+    fields = queryset.query.order_by
+    descending = fields[0].startswith('-')
+    names = [field.lstrip('-') for field in fields]
+    parts = [list(queryset.using(alias)[:limit]) for alias in queryset.aliases()]
+    merged = heapq.merge(*parts, key=lambda obj: tuple(getattr(obj, name) for name in names),
+                         reverse=descending)
+    return list(islice(merged, limit))
@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_user
+from .identity import invalidate_identity
+from .models import Tweet, UserProfile
+from .retention import purge_tweet, purge_user
+from .search import schedule_reindex
+from .tasks import enqueue
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    """Every user gets a profile at creation, so read paths never have to write one."""
+    if created:
+        UserProfile.objects.get_or_create(user=instance)
+    invalidate_user(instance.pk)
+    invalidate_identity(instance.pk)  # the username is part of it
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+    invalidate_identity(instance.pk)
+    enqueue(purge_user, instance.pk)
+
+
+@receiver(post_delete, sender=Tweet)
+def tweet_row_deleted(sender, instance, **kwargs):
+    """However a tweet was deleted, clear out what referenced it."""
+    schedule_reindex(instance.pk)
+    enqueue(purge_tweet, instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+def profile_saved(sender, instance, **kwargs):
+    invalidate_user(instance.user_id)
+    invalidate_identity(instance.user_id)
@@ -0,0 +1,87 @@
+"""
+Denormalized per-user stats on ``UserProfile``.
+
+The write paths that create or remove tweets, likes and follows call these
+helpers inside the same transaction, so a profile read is one row.
+``reconcile_profile_stats`` recounts from the source tables to repair
+drift (bulk loads, user deletions).
+"""
+from collections import Counter
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Follow, Like, Tweet, UserProfile
+from .sharding import each_shard, is_sharded
+
+
+def adjust_counts(user_id, **deltas):
+    """Add ``deltas`` (e.g. ``tweets_count=1``) to ``user_id``'s profile counters."""
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if updates:
+        UserProfile.objects.filter(user_id=user_id).update(**updates)
+
+
+def tweet_created(tweet):
+    adjust_counts(tweet.user_id, tweets_count=1)
+
+
+def tweet_removed(tweet):
+    """Call when deleting ``tweet``; likers lose their like as ``purge_tweet`` removes it."""
+    adjust_counts(tweet.user_id, tweets_count=-1)
+
+
+def follow_changed(follower_id, followee_id, delta):
+    adjust_counts(follower_id, following_count=delta)
+    adjust_counts(followee_id, followers_count=delta)
+
+
+def follows_removed(edges):
+    """``follow_changed(..., -1)`` for many deleted ``(follower_id, followee_id)`` edges."""
+    for field, side in (('following_count', 0), ('followers_count', 1)):
+        by_delta = {}
+        for user_id, n in Counter(edge[side] for edge in edges).items():
+            by_delta.setdefault(n, []).append(user_id)
+        for n, user_ids in by_delta.items():
+            UserProfile.objects.filter(user_id__in=user_ids).update(**{field: F(field) - n})
+
+
+def _count(model, field):
+    rows = (model.objects.filter(**{field: OuterRef('user_id')})
+            .values(field).annotate(n=Count('pk')).values('n'))
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def _shard_totals(model, field, user_ids):
+    """``model`` rows per ``field`` among ``user_ids``, added up over every shard."""
+    totals = Counter()
+    for shard in each_shard(model.objects.filter(**{f'{field}__in': user_ids})):
+        totals.update(dict(shard.values(field).annotate(n=Count('pk')).values_list(field, 'n')))
+    return totals
+
+
+def recount(profiles):
+    """Recompute every counter for ``profiles`` (a queryset), in one UPDATE unless sharded."""
+    if not is_sharded():
+        return profiles.update(
+            tweets_count=_count(Tweet, 'user'),
+            likes_count=_count(Like, 'user'),
+            followers_count=_count(Follow, 'followee'),
+            following_count=_count(Follow, 'follower'),
+        )
+    # Follows sit next to the profiles on default; tweets and likes are on
+    # their owners' shards, out of a subquery's reach, so those are counted
+    # per shard here and written back as totals.
+    updated = profiles.update(
+        followers_count=_count(Follow, 'followee'),
+        following_count=_count(Follow, 'follower'),
+    )
+    user_ids = list(profiles.values_list('user_id', flat=True))
+    tweets = _shard_totals(Tweet, 'user', user_ids)
+    likes = _shard_totals(Like, 'user', user_ids)
+    by_counts = {}
+    for user_id in user_ids:
+        by_counts.setdefault((tweets[user_id], likes[user_id]), []).append(user_id)
+    for (tweets_count, likes_count), ids in by_counts.items():
+        UserProfile.objects.filter(user_id__in=ids).update(tweets_count=tweets_count, likes_count=likes_count)
+    return updated
@@ -0,0 +1,51 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'TWEET_TASK_WORKERS', 2),
+                    thread_name_prefix='tweet-task',
+                )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', func.__name__)
+    finally:
+        connections.close_all()
+
+
+def enqueue(func, *args, **kwargs):
+    """
+    Run ``func(*args, **kwargs)`` off the request thread once the current
+    transaction on ``default`` commits. Code that writes to a shard and
+    enqueues work reading it back opens ``sharding.transactions()``, which
+    commits ``default`` after the shards.
+
+    With ``TWEET_TASKS_EAGER = True`` the task runs inline on commit instead,
+    which is what tests and management commands want.
+    """
+    def submit():
+        if getattr(settings, 'TWEET_TASKS_EAGER', False):
+            func(*args, **kwargs)
+        else:
+            _get_executor().submit(_run, func, args, kwargs)
+
+    transaction.on_commit(submit)
@@ -1,3 +1,912 @@
-from django.test import TestCase
+import base64
+import gzip
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from . import stats
+from .authentication import user_cache_key
+from .entities import parse_hashtags, trending
+from .media import stage_photo, staging_storage
+from .notifications import deliver, unread_count
+from .models import Like, Notification, Tweet, UserProfile
+from .payloads import payload_key
+from .retention import Archive, expire_notifications
+from .search import get_backend
+from .sharding import LEGACY_ID_LIMIT, each_shard, scatter, shard_for_id, shard_for_user
+from .throttling import TokenBucket, rejected_counts
+from .views import LikeBatchView
+
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE, TWEET_TASKS_EAGER=True)
+class TweetTestCase(TestCase):
+    """
+    Background tasks run inline once the transaction commits (inside
+    ``captureOnCommitCallbacks(execute=True)``), never on pool threads, and
+    every test starts with an empty private cache.
+    """
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+
+def with_test_database(alias):
+    """``default`` plus ``alias`` when DATABASE_TEST_URLS provides it."""
+    return {'default', alias} if alias in connections else {'default'}
+
+
+# --- Tweet payload cache ---
+
+class TweetPayloadCacheTests(TweetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = User.objects.create_user('author', password='pw')
+        self.reader = User.objects.create_user('reader', password='pw')
+        self.tweet = Tweet.objects.create(user=self.author, text='first')
+        stats.tweet_created(self.tweet)
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+        self.url = f'/api/tweets/{self.tweet.id}/'
+
+    def test_second_read_is_served_from_the_cache(self):
+        self.assertEqual(self.client.get(self.url).data['text'], 'first')
+        self.assertIsNotNone(cache.get(payload_key(self.tweet)))
+
+        # Bypasses save(), so updated_at and the cache key stay the same.
+        Tweet.objects.filter(pk=self.tweet.pk).update(text='changed behind the cache')
+        self.assertEqual(self.client.get(self.url).data['text'], 'first')
+
+    def test_edit_invalidates_the_payload(self):
+        self.client.get(self.url)
+        old_key = payload_key(self.tweet)
+
+        response = self.client.put(self.url, {'text': 'edited'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['text'], 'edited')
+        self.assertIsNone(cache.get(old_key))
+        self.assertEqual(self.client.get(self.url).data['text'], 'edited')
+
+    def test_delete_invalidates_the_payload(self):
+        self.client.get(self.url)
+        key = payload_key(self.tweet)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, 204)
+        self.assertIsNone(cache.get(key))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_like_count_is_not_served_stale(self):
+        self.assertEqual(self.client.get(self.url).data['like_count'], 0)
+
+        reader = APIClient()
+        reader.force_authenticate(self.reader)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(reader.post(f'{self.url}like/').data['like_count'], 1)
+
+        response = reader.get(self.url)
+        self.assertEqual(response.data['like_count'], 1)
+        self.assertTrue(response.data['is_liked'])
+        self.assertIsNotNone(cache.get(payload_key(self.tweet)))
+
+
+# --- Notifications ---
+
+@override_settings(NOTIFICATION_COALESCE_WINDOW=3600)
+class NotificationCoalescingTests(TweetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = User.objects.create_user('author', password='pw')
+        self.likers = [User.objects.create_user(f'liker{i}', password='pw') for i in range(3)]
+        self.tweet = Tweet.objects.create(user=self.author, text='hello')
+        stats.tweet_created(self.tweet)
+
+    def toggle_like(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(f'/api/tweets/{self.tweet.id}/like/')
+        self.assertEqual(response.status_code, 200)
+
+    def notifications(self):
+        return list(Notification.objects.for_user(self.author.id)
+                    .filter(recipient=self.author, verb='like').order_by('window_start'))
+
+    def test_likes_within_the_window_fold_into_one_entry(self):
+        for liker in self.likers:
+            self.toggle_like(liker)
+
+        [notification] = self.notifications()
+        self.assertEqual(notification.actor_count, 3)
+        self.assertEqual(notification.actor_id, self.likers[-1].id)
+        self.assertEqual(notification.tweet_id, self.tweet.id)
+
+    def test_like_after_the_window_starts_a_new_entry(self):
+        self.toggle_like(self.likers[0])
+        Notification.objects.for_user(self.author.id).update(
+            window_start=timezone.now() - timedelta(hours=2))
+        self.toggle_like(self.likers[1])
+
+        old, new = self.notifications()
+        self.assertEqual((old.actor_id, old.actor_count), (self.likers[0].id, 1))
+        self.assertEqual((new.actor_id, new.actor_count), (self.likers[1].id, 1))
+
+    def test_unlike_retracts_the_actor(self):
+        self.toggle_like(self.likers[0])
+        self.toggle_like(self.likers[1])
+        self.toggle_like(self.likers[1])  # unlike
+
+        [notification] = self.notifications()
+        self.assertEqual(notification.actor_count, 1)
+        self.assertEqual(notification.actor_id, self.likers[0].id)
+
+    def test_last_unlike_removes_the_entry(self):
+        self.toggle_like(self.likers[0])
+        self.toggle_like(self.likers[0])  # unlike
+
+        self.assertEqual(self.notifications(), [])
+
+    def test_own_like_is_not_notified(self):
+        self.toggle_like(self.author)
+
+        self.assertEqual(self.notifications(), [])
+
+    def test_repeated_delivery_updates_the_windows_entry(self):
+        self.toggle_like(self.likers[0])
+        deliver('like', self.author.id, self.likers[0].id, self.tweet.id)
+
+        [notification] = self.notifications()
+        self.assertEqual(notification.actor_count, 1)
+
+    def test_follows_fold_into_one_entry(self):
+        for follower in self.likers:
+            client = APIClient()
+            client.force_authenticate(follower)
+            with self.captureOnCommitCallbacks(execute=True):
+                client.post(f'/api/profile/{self.author.username}/follow/')
+
+        [notification] = Notification.objects.filter(recipient=self.author, verb='follow')
+        self.assertIsNone(notification.tweet_id)
+        self.assertEqual(notification.actor_count, 3)
+        self.assertEqual(notification.actor_id, self.likers[-1].id)
+
+    def test_mark_all_read_moves_the_watermark(self):
+        self.toggle_like(self.likers[0])
+        client = APIClient()
+        client.force_authenticate(self.author)
+        self.assertEqual(client.get('/api/notifications/unread/').data['unread_count'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post('/api/notifications/')
+        self.assertIsNotNone(UserProfile.objects.get(user=self.author).notifications_read_at)
+        cache.clear()  # recount from the watermark
+        self.assertEqual(client.get('/api/notifications/unread/').data['unread_count'], 0)
+
+
+@override_settings(NOTIFICATION_COALESCE_WINDOW=3600)
+class NotificationWindowMigrationTests(TransactionTestCase):
+    before = [('tweet', '0018_deferred_user_cascades')]
+    after = [('tweet', '0019_notification_window_unique')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        self.Notification = apps.get_model('tweet', 'Notification')
+        self.author, self.bob, self.carol = (User.objects.create_user(name, password='pw')
+                                             for name in ('author', 'bob', 'carol'))
+        self.tweet_id = apps.get_model('tweet', 'Tweet').objects.create(user_id=self.author.id, text='x').id
+
+    def tearDown(self):
+        call_command('migrate', verbosity=0)
+
+    def add(self, actor, minute, tweet_id=None, verb='like'):
+        # 0007 gave every row from before coalescing one window_start.
+        created_at = datetime(2026, 3, 1, 10, 0, tzinfo=dt_timezone.utc) + timedelta(minutes=minute)
+        row = self.Notification.objects.create(
+            recipient_id=self.author.id, actor_id=actor.id, verb=verb, tweet_id=tweet_id,
+            window_start=datetime(2026, 3, 1, 9, 0, tzinfo=dt_timezone.utc))
+        self.Notification.objects.filter(pk=row.pk).update(created_at=created_at)  # auto_now_add
+        return created_at
+
+    def test_rows_are_realigned_and_merged_without_losing_actors(self):
+        self.add(self.carol, 1, self.tweet_id)
+        for minute in (5, 10, 20):
+            self.add(self.bob, minute, self.tweet_id)
+        later = self.add(self.bob, 90, self.tweet_id)
+        followed = self.add(self.carol, 2, verb='follow')
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+
+        rows = list(Notification.objects.order_by('created_at')
+                    .values_list('actor_id', 'verb', 'actor_count', 'window_start', 'created_at'))
+        hour = datetime(2026, 3, 1, 10, 0, tzinfo=dt_timezone.utc)
+        self.assertEqual(rows, [
+            (self.carol.id, 'follow', 1, hour, followed),
+            (self.bob.id, 'like', 4, hour, hour + timedelta(minutes=20)),
+            (self.bob.id, 'like', 1, hour + timedelta(hours=1), later),
+        ])
+
+
+# --- Photo ingestion ---
+
+def png_upload(size=(1600, 900), name='photo.png'):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'orange').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class PhotoIngestionTests(TweetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.media_root = os.path.join(self.root, 'media')
+        settings_override = override_settings(
+            PHOTO_STAGING_ROOT=os.path.join(self.root, 'staging'),
+            PHOTO_STORAGE='django.core.files.storage.FileSystemStorage',
+            PHOTO_STORAGE_OPTIONS={'location': self.media_root, 'base_url': '/media/'},
+            PHOTO_VARIANTS={'feed': 1200, 'thumb': 400},
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.author = User.objects.create_user('author', password='pw')
+        self.tweet = Tweet.objects.create(user=self.author, text='look')
+        stats.tweet_created(self.tweet)
+
+    def staged_files(self):
+        storage = staging_storage()
+        if not storage.exists(str(self.tweet.pk)):
+            return []
+        return storage.listdir(str(self.tweet.pk))[1]
+
+    def test_upload_is_staged_and_marked_processing(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            stage_photo(self.tweet, png_upload())
+
+        self.assertEqual(len(callbacks), 1)  # processing waits for the commit
+        self.tweet.refresh_from_db()
+        self.assertEqual(self.tweet.photo_status, Tweet.PHOTO_PROCESSING)
+        self.assertEqual(self.tweet.photo_url, '')
+        self.assertEqual(len(self.staged_files()), 1)
+
+    def test_processing_publishes_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            stage_photo(self.tweet, png_upload())
+
+        self.tweet.refresh_from_db()
+        self.assertEqual(self.tweet.photo_status, Tweet.PHOTO_READY)
+        self.assertEqual(self.tweet.photo_original_url, f'/media/tweets/{self.tweet.pk}/original.png')
+        self.assertEqual(self.tweet.photo_url, f'/media/tweets/{self.tweet.pk}/feed.jpg')
+        self.assertEqual(self.tweet.photo_thumb_url, f'/media/tweets/{self.tweet.pk}/thumb.jpg')
+        variants = os.path.join(self.media_root, 'tweets', str(self.tweet.pk))
+        with Image.open(os.path.join(variants, 'feed.jpg')) as feed:
+            self.assertEqual(feed.size, (1200, 675))
+        with Image.open(os.path.join(variants, 'thumb.jpg')) as thumb:
+            self.assertEqual(thumb.size, (400, 225))
+        self.assertEqual(self.staged_files(), [])
+
+    def test_unreadable_upload_is_marked_failed(self):
+        upload = SimpleUploadedFile('photo.png', b'not an image', content_type='image/png')
+        with self.assertLogs('tweet.media', 'WARNING'):
+            with self.captureOnCommitCallbacks(execute=True):
+                stage_photo(self.tweet, upload)
+
+        self.tweet.refresh_from_db()
+        self.assertEqual(self.tweet.photo_status, Tweet.PHOTO_FAILED)
+        self.assertEqual(self.tweet.photo_url, '')
+        self.assertEqual(self.staged_files(), [])
+
+
+# --- Read replicas ---
+
+@skipUnless('test_replica' in connections, 'needs a test_replica in DATABASE_TEST_URLS')
+@override_settings(REPLICA_DATABASES=['test_replica'])
+class ReplicaRoutingTests(TweetTestCase):
+    # test_replica is a separate database (see DATABASE_TEST_URLS), so nothing
+    # written to default shows up there: each read reveals which one served it.
+    databases = with_test_database('test_replica')
+
+    def setUp(self):
+        super().setUp()
+        self.author = User.objects.create_user('author', password='pw')
+        self.tweet = Tweet.objects.create(user=self.author, text='on the primary')
+        stats.tweet_created(self.tweet)
+        Tweet(id=self.tweet.id, user_id=self.author.id, text='on the replica').save(
+            using='test_replica', force_insert=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+        self.url = f'/api/tweets/{self.tweet.id}/'
+
+    def read_text(self, client):
+        cache.clear()  # both copies would otherwise share a cached payload
+        return client.get(self.url).data['text']
+
+    def test_safe_reads_go_to_the_replica(self):
+        self.assertEqual(self.read_text(self.client), 'on the replica')
+
+    def test_write_goes_to_the_primary_and_pins_reads(self):
+        response = self.client.post('/api/tweets/', {'text': 'new'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('db_primary_until', response.cookies)
+        self.assertTrue(Tweet.objects.using('default').filter(pk=response.data['id']).exists())
+        self.assertFalse(Tweet.objects.using('test_replica').filter(text='new').exists())
+
+        # The pin cookie rides along on this client's next requests.
+        self.assertEqual(self.read_text(self.client), 'on the primary')
+
+        other = APIClient()
+        other.force_authenticate(self.author)
+        self.assertEqual(self.read_text(other), 'on the replica')
+
+    def test_reads_inside_a_write_use_the_primary(self):
+        response = self.client.put(self.url, {'text': 'edited'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['text'], 'edited')
+        self.assertEqual(Tweet.objects.using('test_replica').get(pk=self.tweet.pk).text, 'on the replica')
+
+    def test_failed_write_does_not_pin(self):
+        response = self.client.post('/api/tweets/', {'text': ''}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('db_primary_until', response.cookies)
+        self.assertEqual(self.read_text(self.client), 'on the replica')
+
+
+# --- Sharding ---
+
+SHARDED = override_settings(SHARD_DATABASES=['default', 'test_shard'])
+
+
+@skipUnless('test_shard' in connections, 'needs a test_shard in DATABASE_TEST_URLS')
+class ShardingTests(TweetTestCase):
+    # test_shard is a separate database (see DATABASE_TEST_URLS).
+    databases = with_test_database('test_shard')
+
+    def setUp(self):
+        super().setUp()
+        # Round robin over two shards: even user ids on default, odd on test_shard.
+        users = [User.objects.create_user(f'user{i}', password='pw') for i in range(2)]
+        self.on_default, self.on_shard = sorted(users, key=lambda user: user.id % 2)
+
+    def aliases_holding(self, model, pk):
+        return [alias for alias in ('default', 'test_shard') if model.objects.using(alias).filter(pk=pk).exists()]
+
+    @SHARDED
+    def test_ids_round_trip_to_the_owners_shard(self):
+        for user, alias in ((self.on_default, 'default'), (self.on_shard, 'test_shard')):
+            self.assertEqual(shard_for_user(user.id), alias)
+            tweet = Tweet.objects.create(user=user, text='hi')
+            self.assertGreaterEqual(tweet.id, LEGACY_ID_LIMIT)
+            self.assertEqual(shard_for_id(tweet.id), alias)
+            self.assertEqual(self.aliases_holding(Tweet, tweet.id), [alias])
+            self.assertEqual(Tweet.objects.for_id(tweet.id).get(pk=tweet.id).text, 'hi')
+
+    def test_for_user_includes_rows_from_before_sharding(self):
+        legacy = Tweet.objects.create(user=self.on_shard, text='before')
+        self.assertLess(legacy.id, LEGACY_ID_LIMIT)
+        with SHARDED:
+            new = Tweet.objects.create(user=self.on_shard, text='after')
+            tweets = Tweet.objects.for_user(self.on_shard.id).filter(user=self.on_shard)
+
+            self.assertEqual(self.aliases_holding(Tweet, legacy.id), ['default'])
+            self.assertEqual(self.aliases_holding(Tweet, new.id), ['test_shard'])
+            self.assertEqual(tweets.count(), 2)
+            self.assertEqual({t.id for part in each_shard(tweets) for t in part}, {legacy.id, new.id})
+            with override_settings(SHARD_LEGACY_ROWS=False):
+                tweets = Tweet.objects.for_user(self.on_shard.id).filter(user=self.on_shard)
+                self.assertEqual([t.id for t in tweets], [new.id])
+
+    @SHARDED
+    def test_scatter_merges_shards_in_order(self):
+        tweets = [Tweet.objects.create(user=user, text=str(i))
+                  for i, user in enumerate([self.on_default, self.on_shard] * 3)]
+
+        newest = scatter(Tweet.objects.order_by('-created_at', '-id'), 4)
+        self.assertEqual([t.id for t in newest], [t.id for t in reversed(tweets)][:4])
+        oldest = scatter(Tweet.objects.order_by('created_at', 'id'), 3)
+        self.assertEqual([t.id for t in oldest], [t.id for t in tweets][:3])
+
+    def like_toggle(self, user, tweet):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post(f'/api/tweets/{tweet.id}/like/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    @SHARDED
+    def test_like_toggle_across_shards(self):
+        tweet = Tweet.objects.create(user=self.on_shard, text='like me')
+        liker = self.on_default
+
+        self.assertEqual(self.like_toggle(liker, tweet), {'liked': True, 'like_count': 1})
+        [like] = Like.objects.using('default').filter(user=liker, tweet_id=tweet.id)
+        self.assertEqual(self.aliases_holding(Like, like.id), ['default'])
+        self.assertEqual(Tweet.objects.using('test_shard').get(pk=tweet.id).like_count, 1)
+        self.assertEqual(UserProfile.objects.get(user=liker).likes_count, 1)
+
+        self.assertEqual(self.like_toggle(liker, tweet), {'liked': False, 'like_count': 0})
+        self.assertEqual(self.aliases_holding(Like, like.id), [])
+        self.assertEqual(UserProfile.objects.get(user=liker).likes_count, 0)
+
+    def test_like_toggle_removes_a_like_from_before_sharding(self):
+        tweet = Tweet.objects.create(user=self.on_default, text='old')
+        liker = self.on_shard
+        self.assertEqual(self.like_toggle(liker, tweet), {'liked': True, 'like_count': 1})
+        [like] = Like.objects.filter(user=liker)
+
+        with SHARDED:
+            # The legacy like on default is found, not duplicated on the liker's shard.
+            self.assertEqual(self.like_toggle(liker, tweet), {'liked': False, 'like_count': 0})
+            self.assertEqual(self.aliases_holding(Like, like.id), [])
+            self.assertFalse(Like.objects.using('test_shard').exists())
+
+    @SHARDED
+    def test_repair_commands_count_across_shards(self):
+        tweets = [Tweet.objects.create(user=user, text=f'shard {user.username}')
+                  for user in (self.on_default, self.on_shard)]
+        # Each like sits on its liker's shard, away from one of the tweets.
+        for liker in (self.on_default, self.on_shard):
+            for tweet in tweets:
+                Like.objects.create(user=liker, tweet=tweet)
+        Tweet.objects.update(like_count=7)
+        UserProfile.objects.update(tweets_count=3, likes_count=3, followers_count=3)
+
+        call_command('reconcile_like_counts', stdout=StringIO())
+        call_command('reconcile_profile_stats', stdout=StringIO())
+        call_command('rebuild_search_index', stdout=StringIO())
+
+        self.assertEqual([Tweet.objects.for_id(t.id).get(pk=t.id).like_count for t in tweets], [2, 2])
+        self.assertEqual(list(UserProfile.objects.values_list('tweets_count', 'likes_count', 'followers_count')),
+                         [(1, 2, 0)] * 2)
+        self.assertEqual({pk for pk, _ in get_backend().search('shard')}, {t.id for t in tweets})
+
+
+# --- Hashtags and trends ---
+
+class TrendCountTests(TweetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = User.objects.create_user('author', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def post(self, text):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/tweets/', {'text': text}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def trends(self):
+        cache.clear()
+        return {trend['tag']: trend['count'] for trend in trending()}
+
+    def test_edit_takes_back_removed_tags(self):
+        self.post('#django #python')
+        tweet_id = self.post('#django #rust')
+        self.assertEqual(self.trends(), {'django': 2, 'python': 1, 'rust': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(f'/api/tweets/{tweet_id}/', {'text': '#python only'}, format='json')
+        self.assertEqual(self.trends(), {'django': 1, 'python': 2})
+
+    def test_delete_takes_back_the_tweets_tags(self):
+        self.post('#django')
+        tweet_id = self.post('#django #rust')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(f'/api/tweets/{tweet_id}/').status_code, 204)
+        self.assertEqual(self.trends(), {'django': 1})
+
+    def test_overlong_tags_are_skipped_not_truncated(self):
+        self.assertEqual(parse_hashtags(f'#{"a" * 50} #{"b" * 51} #Ok'), {'a' * 50, 'ok'})
+
+
+# --- Batch endpoints ---
+
+class BatchEndpointTests(TweetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = User.objects.create_user('author', password='pw')
+        self.liker = User.objects.create_user('liker', password='pw')
+        self.tweets = [Tweet.objects.create(user=self.author, text=str(i)) for i in range(3)]
+        for tweet in self.tweets:
+            stats.tweet_created(tweet)
+        self.client = APIClient()
+        self.client.force_authenticate(self.liker)
+
+    def batch(self, *operations):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/likes/batch/', {'operations': list(operations)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def like_counts(self):
+        return [Tweet.objects.get(pk=tweet.pk).like_count for tweet in self.tweets]
+
+    def likes_count(self):
+        return UserProfile.objects.get(user=self.liker).likes_count
+
+    def test_lookup_keeps_request_order_and_reports_missing(self):
+        first, second, _ = self.tweets
+        response = self.client.get(f'/api/tweets/batch/?ids={second.id},999999,{first.id},{second.id}')
+
+        self.assertEqual([t['id'] for t in response.data['results']], [second.id, first.id])
+        self.assertEqual(response.data['missing'], [999999])
+        self.assertEqual(self.client.get('/api/tweets/batch/?ids=1,x').status_code, 400)
+
+    def test_batch_sets_like_state_and_counters(self):
+        first, second, third = self.tweets
+        results = self.batch({'tweet': first.id, 'action': 'like'}, {'tweet': second.id, 'action': 'like'},
+                             {'tweet': 999999, 'action': 'like'})
+        self.assertEqual([r.get('changed') for r in results], [True, True, None])
+        self.assertEqual(results[2], {'tweet': 999999, 'error': 'Not found'})
+        self.assertEqual(self.like_counts(), [1, 1, 0])
+        self.assertEqual(self.likes_count(), 2)
+
+        # Replaying is harmless; only the unlike changes anything.
+        results = self.batch({'tweet': first.id, 'action': 'like'}, {'tweet': second.id, 'action': 'unlike'},
+                             {'tweet': third.id, 'action': 'unlike'})
+        self.assertEqual([r['changed'] for r in results], [False, True, False])
+        self.assertEqual([r['like_count'] for r in results], [1, 0, 0])
+        self.assertEqual(self.like_counts(), [1, 0, 0])
+        self.assertEqual(self.likes_count(), 1)
+        self.assertEqual(Notification.objects.filter(recipient=self.author, verb='like').count(), 1)
+
+    def test_malformed_batches_are_rejected(self):
+        for body in ([{'tweet': 1, 'action': 'like'}], {'operations': []},
+                     {'operations': [{'tweet': '1', 'action': 'like'}]},
+                     {'operations': [{'tweet': True, 'action': 'like'}]},
+                     {'operations': [{'tweet': 1, 'action': 'love'}]}):
+            response = self.client.post('/api/likes/batch/', body, format='json')
+            self.assertEqual(response.status_code, 400, body)
+
+    def test_like_inserted_concurrently_is_counted_once(self):
+        tweet = self.tweets[0]
+        real_insert = LikeBatchView.insert_like
+
+        def racing_insert(view, likes, user, tweet_id):
+            # Another batch inserts (and counts) the like between our read and insert.
+            Like.objects.create(user=user, tweet_id=tweet_id)
+            Tweet.objects.filter(pk=tweet_id).update(like_count=1)
+            stats.adjust_counts(user.id, likes_count=1)
+            return real_insert(view, likes, user, tweet_id)
+
+        with mock.patch.object(LikeBatchView, 'insert_like', racing_insert):
+            [result] = self.batch({'tweet': tweet.id, 'action': 'like'})
+
+        self.assertEqual(result['changed'], False)
+        self.assertEqual(self.like_counts()[0], 1)
+        self.assertEqual(self.likes_count(), 1)
+
+    def test_like_deleted_concurrently_is_uncounted_once(self):
+        tweet = self.tweets[0]
+        self.batch({'tweet': tweet.id, 'action': 'like'})
+        real_delete = LikeBatchView.delete_like
+
+        def racing_delete(view, like_id):
+            # Another batch deletes (and uncounts) the like between our read and delete.
+            Like.objects.filter(pk=like_id).delete()
+            Tweet.objects.filter(pk=tweet.id).update(like_count=0)
+            stats.adjust_counts(self.liker.id, likes_count=-1)
+            return real_delete(view, like_id)
+
+        with mock.patch.object(LikeBatchView, 'delete_like', racing_delete):
+            [result] = self.batch({'tweet': tweet.id, 'action': 'unlike'})
+
+        self.assertEqual(result['changed'], False)
+        self.assertEqual(self.like_counts()[0], 0)
+        self.assertEqual(self.likes_count(), 0)
+
+
+# --- Throttling ---
+
+LIKE_BUCKETS = {'like': {'user': {'rate': '6/minute', 'burst': 2}}}
+
+
+class TokenBucketTests(TweetTestCase):
+    def test_burst_then_refill_at_the_rate(self):
+        bucket = TokenBucket('throttle:test', rate=0.1, burst=2)
+        self.assertEqual([bucket.take(now=0), bucket.take(now=0)], [0, 0])
+        self.assertAlmostEqual(bucket.take(now=0), 10)
+        self.assertAlmostEqual(bucket.take(now=5), 5)  # the denied take was given back
+        self.assertEqual(bucket.take(now=10), 0)
+        # Idle credit tops out at the burst.
+        self.assertEqual([bucket.take(now=1000), bucket.take(now=1000)], [0, 0])
+        self.assertGreater(bucket.take(now=1000), 0)
+
+    def test_a_bucket_in_use_does_not_expire_full(self):
+        bucket = TokenBucket('throttle:test', rate=0.1, burst=2)
+        with mock.patch('time.time', return_value=0):
+            self.assertEqual(bucket.take(2), 0)
+        # Taking every token as it is earned, well past the keys' first expiry.
+        for now in range(10, 2 * bucket.timeout + 1, 10):
+            with mock.patch('time.time', return_value=now):
+                self.assertEqual(bucket.take(), 0, now)
+                self.assertGreater(bucket.take(), 0, now)
+
+
+@override_settings(THROTTLE_BUCKETS=LIKE_BUCKETS)
+class LikeThrottleTests(TweetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('liker', password='pw')
+        author = User.objects.create_user('author', password='pw')
+        self.tweets = [Tweet.objects.create(user=author, text=str(i)) for i in range(3)]
+        for tweet in self.tweets:
+            stats.tweet_created(tweet)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def like(self, tweet):
+        return self.client.post(f'/api/tweets/{tweet.id}/like/')
+
+    def test_requests_beyond_the_burst_are_refused(self):
+        self.assertEqual([self.like(tweet).status_code for tweet in self.tweets[:2]], [200, 200])
+        response = self.like(self.tweets[2])
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '10')
+        self.assertEqual(rejected_counts(), {'like:user': 1})
+        # Reads are never throttled.
+        self.assertEqual(self.client.get(f'/api/tweets/{self.tweets[0].id}/').status_code, 200)
+
+    def test_a_batch_costs_a_token_per_operation(self):
+        operations = [{'tweet': tweet.id, 'action': 'like'} for tweet in self.tweets]
+        response = self.client.post('/api/likes/batch/', {'operations': operations[:2]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.like(self.tweets[2]).status_code, 429)
+
+
+# --- Retention ---
+
+@override_settings(RETENTION_BATCH_SIZE=1, RETENTION_BATCH_PAUSE=0)
+class RetentionTests(TweetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = User.objects.create_user('author', password='pw')
+        self.others = [User.objects.create_user(f'other{i}', password='pw') for i in range(3)]
+
+    def test_purge_tweet_clears_what_referenced_it_batch_by_batch(self):
+        tweet = Tweet.objects.create(user=self.author, text='#gone soon')
+        stats.tweet_created(tweet)
+        for user in self.others:
+            client = APIClient()
+            client.force_authenticate(user)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(client.post(f'/api/tweets/{tweet.id}/like/').status_code, 200)
+        self.assertEqual(unread_count(self.author.id), 1)  # three likes, one entry
+
+        client = APIClient()
+        client.force_authenticate(self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(client.delete(f'/api/tweets/{tweet.id}/').status_code, 204)
+
+        # One row per batch, so this took several rescheduled runs.
+        self.assertFalse(Like.objects.filter(tweet_id=tweet.id).exists())
+        self.assertFalse(Notification.objects.filter(tweet_id=tweet.id).exists())
+        self.assertEqual(set(UserProfile.objects.filter(user__in=self.others).values_list('likes_count', flat=True)),
+                         {0})
+        self.assertEqual(unread_count(self.author.id), 0)
+
+    def notification(self, actor, days_ago):
+        created = timezone.now() - timedelta(days=days_ago)
+        notification = Notification.objects.create(recipient=self.author, actor=actor, verb='follow',
+                                                   window_start=created)
+        Notification.objects.filter(pk=notification.pk).update(created_at=created)
+        return notification.pk
+
+    def test_expire_removes_read_and_overage_notifications(self):
+        read = self.notification(self.others[0], days_ago=60)
+        unread = self.notification(self.others[1], days_ago=50)
+        overage = self.notification(self.others[2], days_ago=400)
+        UserProfile.objects.filter(user=self.author).update(
+            notifications_read_at=timezone.now() - timedelta(days=55))
+        recent = self.notification(self.others[0], days_ago=1)
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        archive = Archive(directory, 'notifications.jsonl.gz')
+        self.assertEqual(expire_notifications(archive=archive), 2)
+        archive.close()
+
+        self.assertEqual(set(Notification.objects.values_list('pk', flat=True)), {unread, recent})
+        with gzip.open(archive.path, 'rt') as archived:
+            self.assertEqual({json.loads(line)['id'] for line in archived}, {read, overage})
+
+
+# --- Authentication ---
+
+class CachedUserTests(TweetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='old password')
+        self.client.login(username='alice', password='old password')
+
+    def unread(self):
+        return self.client.get('/api/notifications/unread/').status_code
+
+    def test_the_cached_user_has_no_password_hash(self):
+        self.assertTrue(self.client.get('/api/auth/status/').data['is_authenticated'])
+        cached = cache.get(user_cache_key(self.user.id))
+        self.assertNotIn(self.user.password.encode(), pickle.dumps(cached))
+        # The session is still checked, against the cached HMAC, with no query.
+        with self.assertNumQueries(0):
+            self.assertTrue(self.client.get('/api/auth/status/').data['is_authenticated'])
+
+    def test_changing_the_password_ends_other_sessions(self):
+        self.assertEqual(self.unread(), 200)
+        self.user.set_password('new password')
+        self.user.save()
+        self.assertEqual(self.unread(), 403)
+
+
+# --- Keyset pagination ---
+
+class KeysetPaginationTests(TweetTestCase):
+    def setUp(self):
+        super().setUp()
+        author = User.objects.create_user('author', password='pw')
+        self.tweets = [Tweet.objects.create(user=author, text=str(i)) for i in range(5)]
+        # Three share a created_at, so only the id tells them apart.
+        tied = timezone.now()
+        Tweet.objects.filter(pk__in=[t.pk for t in self.tweets[1:4]]).update(created_at=tied)
+        Tweet.objects.filter(pk=self.tweets[4].pk).update(created_at=tied + timedelta(seconds=1))
+        self.client = APIClient()
+
+    def page(self, cursor=None):
+        params = {'limit': 2}
+        if cursor:
+            params['cursor'] = cursor
+        response = self.client.get('/api/tweets/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_pages_walk_ties_without_skipping_or_repeating(self):
+        pages, cursor = [], None
+        while True:
+            page = self.page(cursor)
+            pages.append([t['id'] for t in page['results']])
+            cursor = page['next']
+            if cursor is None:
+                break
+        newest_first = [t.id for t in reversed(self.tweets)]
+        self.assertEqual(pages, [newest_first[:2], newest_first[2:4], newest_first[4:]])
+
+        # Walking back from the last page returns the page before it.
+        back = self.page(page['prev'])
+        self.assertEqual([t['id'] for t in back['results']], newest_first[2:4])
+        self.assertIsNotNone(back['next'])
+
+    def test_invalid_cursors_are_rejected(self):
+        for cursor in ('not base64!', base64.urlsafe_b64encode(b'r=0&id=1').decode(),
+                       base64.urlsafe_b64encode(b'r=0&created_at=yesterday&id=1').decode()):
+            response = self.client.get('/api/tweets/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+            self.assertEqual(response.data['detail'], 'Invalid cursor')
+
+
+# --- Conditional GET ---
+
+class ConditionalGetTests(TweetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = User.objects.create_user('author', password='pw')
+        self.tweet = Tweet.objects.create(user=self.author, text='cache me')
+        stats.tweet_created(self.tweet)
+        self.client = APIClient()
+
+    def get(self, url, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(url, **headers)
+
+    def assert_round_trip(self, url):
+        """Return the ETag for ``url`` after checking a matching request gets a 304."""
+        response = self.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        cached = self.get(url, etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached['ETag'], etag)
+        return etag
+
+    def test_etag_changes_with_what_the_response_shows(self):
+        for i, url in enumerate((f'/api/tweets/{self.tweet.id}/', '/api/tweets/')):
+            etag = self.assert_round_trip(url)
+
+            Tweet.objects.filter(pk=self.tweet.pk).update(like_count=F('like_count') + 1)
+            self.assertEqual(self.get(url, etag).status_code, 200)
+            etag = self.assert_round_trip(url)
+
+            self.author.username = f'renamed{i}'
+            self.author.save()
+            response = self.get(url, etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(self.author.username, response.content.decode())
+
+    def test_the_etag_is_per_viewer(self):
+        url = f'/api/tweets/{self.tweet.id}/'
+        etag = self.assert_round_trip(url)
+        viewer = User.objects.create_user('viewer', password='pw')
+        self.client.force_authenticate(viewer)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/tweets/{self.tweet.id}/like/')
+
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['is_liked'])
+        self.assertIn('Cookie', response['Vary'])
+
+
+# --- Search ---
+
+class SearchTests(TweetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = User.objects.create_user('author', password='pw')
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def post(self, text):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/tweets/', {'text': text}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def search(self, query, **params):
+        response = self.client.get('/api/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def found(self, query):
+        return [t['id'] for t in self.search(query)['results']]
+
+    def test_best_match_first_and_kept_current(self):
+        once = self.post('Learning python today')
+        twice = self.post('python python everywhere')
+        self.post('nothing to see')
+        self.assertEqual(self.found('python'), [twice, once])
+        self.assertEqual(self.found('PYTHON everywhere'), [twice])
+        self.assertEqual(self.found('   '), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(f'/api/tweets/{twice}/', {'text': 'rust now'}, format='json')
+        self.assertEqual(self.found('python'), [once])
+        self.assertEqual(self.found('rust'), [twice])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/tweets/{once}/')
+        self.assertEqual(self.found('python'), [])
+
+    def test_operators_are_matched_as_words(self):
+        tweet = self.post('AND OR NOT near "quoted"')
+        self.assertEqual(self.found('"quoted" OR'), [tweet])
+        self.assertEqual(self.found('NOT*'), [tweet])
+
+    def test_pages_follow_the_rank_cursor(self):
+        ids = [self.post(f'tea {"tea " * i}') for i in range(3)]
+        first = self.search('tea', limit=2)
+        second = self.search('tea', limit=2, cursor=first['next'])
+        self.assertEqual([t['id'] for t in first['results'] + second['results']], ids[::-1])
+        self.assertIsNone(second['next'])
+        back = self.search('tea', limit=2, cursor=second['prev'])
+        self.assertEqual([t['id'] for t in back['results']], ids[:0:-1])
@@ -0,0 +1,146 @@
+"""
+Token-bucket rate limits for write endpoints.
+
+A view opts in with ``throttle_scope`` and the throttle classes below;
+``THROTTLE_BUCKETS[scope]`` gives each kind of bucket a refill ``rate``
+(``'N/second|minute|hour|day'``) and a ``burst`` capacity::
+
+    'like': {'user': {'rate': '600/hour', 'burst': 60}, 'ip': {...}}
+
+``user`` buckets are keyed by the authenticated user, or for login by the
+username being tried; ``ip`` buckets by client address (DRF's
+``get_ident``, which honours ``NUM_PROXIES``). Safe methods are never
+throttled. A view can charge more than one token per request with
+``throttle_cost(request)``.
+
+Buckets live in the default cache and are updated with ``add``/``incr``
+(and ``touch``) only, so concurrent workers never lose a token (use a cache with atomic
+``incr``, e.g. Redis or Memcached; the database cache is not atomic). A
+bucket is a start time and a count of tokens taken; tokens earned since the
+start are ``rate * elapsed``, credit beyond ``burst`` is burned, and a
+denied request gives its token back. Every take pushes both keys' expiry
+forward, so only a bucket left idle long enough to refill expires. Rejections are counted per scope and
+kind; see ``rejected_counts()``.
+"""
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def buckets():
+    return getattr(settings, 'THROTTLE_BUCKETS', {})
+
+
+def parse_rate(rate):
+    """``'30/minute'`` -> tokens per second."""
+    count, period = rate.split('/')
+    return int(count) / PERIODS[period[0]]
+
+
+def rejected_key(scope, kind):
+    return f'throttle:rejected:{scope}:{kind}'
+
+
+def rejected_counts():
+    """Requests refused since the counters were last evicted, per ``scope:kind``."""
+    keys = {rejected_key(scope, kind): f'{scope}:{kind}' for scope, kinds in buckets().items() for kind in kinds}
+    found = cache.get_many(list(keys))
+    return {label: found.get(key, 0) for key, label in keys.items()}
+
+
+class TokenBucket:
+    def __init__(self, key, rate, burst):
+        self.key = key
+        self.rate = rate
+        self.burst = burst
+        # Long enough that an idle bucket is full again before it expires.
+        self.timeout = math.ceil(burst / rate) * 10
+
+    def take(self, cost=1, now=None):
+        """Take ``cost`` tokens; return 0 if allowed, else seconds until they would be."""
+        now = time.time() if now is None else now
+        start_key = f'{self.key}:start'
+        cache.add(start_key, now, self.timeout)
+        start = cache.get(start_key, now)
+        # The count is versioned by start time, so a fresh start never sees an old count.
+        count_key = f'{self.key}:{start:.6f}'
+        cache.add(count_key, 0, self.timeout + 60)
+        try:
+            taken = cache.incr(count_key, cost)
+        except ValueError:  # evicted in between; start over
+            cache.delete(start_key)
+            return self.take(cost, now)
+        # Expiring the start of a bucket in use would hand it a full burst.
+        cache.touch(start_key, self.timeout)
+        cache.touch(count_key, self.timeout + 60)
+
+        left = self.burst + self.rate * (now - start) - taken
+        if left < 0:
+            cache.decr(count_key, cost)
+            return (-left) / self.rate
+        overflow = math.floor(left - (self.burst - cost))
+        if overflow > 0:
+            cache.incr(count_key, overflow)  # a bucket never holds more than ``burst``
+        return 0
+
+
+class TokenBucketThrottle(BaseThrottle):
+    kind = None
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = getattr(view, 'throttle_scope', None)
+        config = buckets().get(scope, {}).get(self.kind)
+        if config is None or request.method in SAFE_METHODS:
+            return True
+        ident = self.get_bucket_ident(request, view)
+        if ident is None:
+            return True
+        bucket = TokenBucket(f'throttle:{scope}:{self.kind}:{ident}',
+                             parse_rate(config['rate']), config.get('burst', 1))
+        cost = view.throttle_cost(request) if hasattr(view, 'throttle_cost') else 1
+        self.wait_seconds = bucket.take(min(cost, bucket.burst))
+        if not self.wait_seconds:
+            return True
+        key = rejected_key(scope, self.kind)
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+        return False
+
+    def get_bucket_ident(self, request, view):
+        raise NotImplementedError
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """Per user; anonymous requests are keyed by ``throttle_username_field`` if the view names one."""
+    kind = 'user'
+
+    def get_bucket_ident(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return f'id:{request.user.pk}'
+        field = getattr(view, 'throttle_username_field', None)
+        # Runs before the view validates the body, which may not be an object.
+        username = request.data.get(field) if field and isinstance(request.data, dict) else None
+        if isinstance(username, str) and username:
+            return 'name:' + hashlib.sha256(username.lower().encode()).hexdigest()[:32]
+        return None
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    kind = 'ip'
+
+    def get_bucket_ident(self, request, view):
+        return self.get_ident(request)
+
+
+THROTTLE_CLASSES = [UserTokenBucketThrottle, IPTokenBucketThrottle]
@@ -0,0 +1,106 @@
+"""
+Fan-out-on-write home timelines.
+
+A new tweet is copied into each follower's ``TimelineEntry`` rows by
+background tasks, one bounded batch of followers per task. Authors with more
+than ``TIMELINE_FANOUT_MAX_FOLLOWERS`` followers are flagged
+``fanout_on_read`` instead, and ``HomeTimelinePagination`` merges their
+tweets in when a follower reads the timeline.
+"""
+from django.conf import settings
+
+from .models import Follow, TimelineEntry, Tweet, UserProfile
+from .sharding import each_shard, is_sharded, scatter
+from .tasks import enqueue
+
+
+def fanout_batch_size():
+    return getattr(settings, 'TIMELINE_FANOUT_BATCH_SIZE', 1000)
+
+
+def fanout_max_followers():
+    return getattr(settings, 'TIMELINE_FANOUT_MAX_FOLLOWERS', 10000)
+
+
+def backfill_size():
+    return getattr(settings, 'TIMELINE_BACKFILL_SIZE', 50)
+
+
+def fan_out_tweet(tweet):
+    """Schedule delivery of a freshly created tweet to home timelines."""
+    enqueue(deliver_tweet, tweet.id)
+
+
+def deliver_tweet(tweet_id, after_follower_id=0):
+    """Deliver one batch of followers, then schedule the next batch."""
+    tweet = Tweet.objects.for_id(tweet_id).filter(pk=tweet_id).first()
+    if tweet is None:
+        return
+
+    if after_follower_id == 0:
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(owner_id=tweet.user_id, tweet=tweet, created_at=tweet.created_at)],
+            ignore_conflicts=True,
+        )
+        if is_fanout_on_read(tweet.user_id):
+            return
+
+    follower_ids = list(
+        Follow.objects.filter(followee_id=tweet.user_id, follower_id__gt=after_follower_id)
+        .order_by('follower_id')
+        .values_list('follower_id', flat=True)[:fanout_batch_size()]
+    )
+    if not follower_ids:
+        return
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(owner_id=pk, tweet=tweet, created_at=tweet.created_at) for pk in follower_ids],
+        ignore_conflicts=True,
+    )
+    if len(follower_ids) == fanout_batch_size():
+        enqueue(deliver_tweet, tweet_id, follower_ids[-1])
+
+
+def is_fanout_on_read(user_id):
+    """
+    Return True if the user's tweets are pulled at read time.
+
+    Decided from the denormalized ``followers_count``, in one single-row
+    read. The flag is sticky: once an author crosses the threshold their
+    older tweets are only reachable through the read-time merge.
+    """
+    profile = (UserProfile.objects.filter(user_id=user_id)
+               .values('fanout_on_read', 'followers_count').first())
+    if profile is None:
+        return False
+    if profile['fanout_on_read']:
+        return True
+    if profile['followers_count'] <= fanout_max_followers():
+        return False
+    UserProfile.objects.filter(user_id=user_id).update(fanout_on_read=True)
+    return True
+
+
+def backfill_follow(follower_id, followee_id):
+    """Copy the followee's recent tweets into a new follower's timeline."""
+    if UserProfile.objects.filter(user_id=followee_id, fanout_on_read=True).exists():
+        return
+    recent = scatter(Tweet.objects.for_user(followee_id).filter(user_id=followee_id)
+                     .order_by('-created_at', '-id').only('id', 'created_at'), backfill_size())
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(owner_id=follower_id, tweet_id=tweet.id, created_at=tweet.created_at)
+         for tweet in recent],
+        ignore_conflicts=True,
+    )
+
+
+def purge_unfollow(follower_id, followee_id):
+    """Drop the former followee's tweets from the follower's timeline."""
+    entries = TimelineEntry.objects.filter(owner_id=follower_id)
+    if not is_sharded():
+        entries.filter(tweet__user_id=followee_id).delete()
+        return
+    # The followee's tweets are on their shard; no join across databases.
+    tweets = Tweet.objects.for_user(followee_id).filter(user_id=followee_id)
+    tweet_ids = [pk for shard in each_shard(tweets) for pk in shard.values_list('id', flat=True)]
+    for start in range(0, len(tweet_ids), 500):
+        entries.filter(tweet_id__in=tweet_ids[start:start + 500]).delete()
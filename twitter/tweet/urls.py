@@ -16,12 +16,22 @@ urlpatterns = [
     path('api/auth/register/', views.APIRegisterView.as_view(), name='api_register'),
 
     path('api/tweets/', views.TweetListCreateView.as_view(), name='api_tweets'),
+    path('api/tweets/home/', views.HomeTimelineView.as_view(), name='api_home_timeline'),
+    path('api/tweets/batch/', views.TweetBatchView.as_view(), name='api_tweet_batch'),
     path('api/tweets/<int:pk>/', views.TweetDetailView.as_view(), name='api_tweet_detail'),
     path('api/tweets/<int:pk>/like/', views.LikeToggleView.as_view(), name='api_like_toggle'),
+    path('api/likes/batch/', views.LikeBatchView.as_view(), name='api_like_batch'),
+
+    path('api/search/', views.SearchView.as_view(), name='api_search'),
+    path('api/trends/', views.TrendsView.as_view(), name='api_trends'),
 
     path('api/notifications/', views.NotificationListView.as_view(), name='api_notifications'),
+    path('api/notifications/unread/', views.UnreadCountView.as_view(), name='api_notifications_unread'),
 
     path('api/profile/<str:username>/', views.UserProfileView.as_view(), name='api_profile'),
     path('api/profile/<str:username>/tweets/', views.UserTweetsView.as_view(), name='api_user_tweets'),
+    path('api/profile/<str:username>/follow/', views.FollowView.as_view(), name='api_follow'),
+    path('api/health/', views.HealthView.as_view(), name='api_health'),
     path('api/csrf/', views.csrf_init, name='api_csrf'),
+    path('api/stream/', views.event_stream, name='api_stream'),
 ]
@@ -0,0 +1,33 @@
+from .models import Like
+from .sharding import each_shard
+
+
+class ViewerState:
+    """
+    Per-viewer flags for a page of tweets.
+
+    Each flag is resolved for the whole page with a single query keyed by
+    tweet ids, then looked up in memory by ``TweetSerializer``.
+    """
+
+    def __init__(self, liked_ids=()):
+        self.liked_ids = frozenset(liked_ids)
+
+    @classmethod
+    def for_tweets(cls, user, tweets):
+        tweet_ids = [tweet.id for tweet in tweets]
+        if not tweet_ids or not user.is_authenticated:
+            return cls()
+        likes = Like.objects.for_user(user.id).filter(user=user, tweet_id__in=tweet_ids)
+        return cls(liked_ids=[pk for shard in each_shard(likes) for pk in shard.values_list('tweet_id', flat=True)])
+
+    def is_liked(self, tweet):
+        return tweet.id in self.liked_ids
+
+
+def tweet_context(request, tweets):
+    """Serializer context for ``TweetSerializer`` with viewer state preloaded."""
+    return {
+        'request': request,
+        'viewer_state': ViewerState.for_tweets(request.user, tweets),
+    }
@@ -1,22 +1,73 @@
+from django.conf import settings
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login as auth_login, logout as auth_logout, authenticate
 from django.shortcuts import get_object_or_404, redirect
+from django.db import IntegrityError, transaction
+from django.db.models import F
 
 from rest_framework import status, generics, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import Tweet, Like, Notification, UserProfile
+from .models import Tweet, Like, UserProfile, Follow, Notification
 from .forms import TweetForm, Userregistrationform
+from .pagination import (
+    TweetCursorPagination, HomeTimelinePagination, SearchPagination, RankedFeedPagination,
+)
+from .search import get_backend as get_search_backend, schedule_reindex
+from .entities import schedule_sync, trending
+from .timeline import fan_out_tweet, backfill_follow, purge_unfollow
+from .tasks import enqueue
+from .realtime import publish_on_commit
+from .conditional import make_etag, tweets_etag, not_modified, patch_validators
+from .notifications import notify, retract, read_watermark, unread_count, mark_all_read
+from .viewer_state import tweet_context
+from .payloads import serialize_tweets, serialize_tweet, invalidate_tweet
+from . import dbhealth, stats
+from .media import stage_photo
+from .metrics import measure
+from .profiling import ProfilingMixin
+from .throttling import THROTTLE_CLASSES, rejected_counts
+from .sharding import each_shard, scatter, shard_databases, shard_for_user, transactions
+from .identity import load_identities, get_identity
 from .serializers import (
-    TweetSerializer, TweetCreateSerializer,
+    TweetCreateSerializer,
     UserProfileSerializer, NotificationSerializer,
     RegisterSerializer, UserMiniSerializer,
 )
 
 
+def tweet_saved(tweet, created=False):
+    """Update derived data after a tweet create or edit; call in the saving transaction."""
+    schedule_reindex(tweet.id)
+    schedule_sync(tweet.id)
+    if created:
+        stats.tweet_created(tweet)
+        fan_out_tweet(tweet)
+        publish_on_commit('tweets', {'type': 'tweet', 'id': tweet.id, 'user': tweet.user_id})
+
+
+def batch_max():
+    return getattr(settings, 'TWEET_BATCH_MAX', 100)
+
+
+def parse_id_list(value):
+    """``"1,2,3"`` -> ``[1, 2, 3]`` without duplicates, or None if malformed."""
+    try:
+        ids = [int(part) for part in value.split(',') if part.strip()]
+    except ValueError:
+        return None
+    return list(dict.fromkeys(ids)) or None
+
+
+def tweet_deleted(tweet):
+    """Drop derived data for a tweet that is about to be deleted, in the same transaction."""
+    invalidate_tweet(tweet)
+    stats.tweet_removed(tweet)
+
+
 # ──────────────────────────────────
 # LEGACY TEMPLATE VIEWS (keep)
 # ──────────────────────────────────
@@ -26,7 +77,7 @@ def index(request):
 
 
 def tweet_list(request):
-    tweets = Tweet.objects.all().order_by('-created_at')
+    tweets = Tweet.objects.select_related('user').order_by('-created_at')
     return render(request, 'tweet_list.html', {'tweets': tweets})
 
 
@@ -35,9 +86,12 @@ def tweet_create(request):
     if request.method == "POST":
         form = TweetForm(request.POST, request.FILES)
         if form.is_valid():
-            tweet = form.save(commit=False)
-            tweet.user = request.user
-            tweet.save()
+            with transaction.atomic():
+                tweet = form.save(commit=False)
+                tweet.user = request.user
+                tweet.save()
+                stage_photo(tweet, form.cleaned_data['photo'])
+                tweet_saved(tweet, created=True)
             return redirect('tweet_list')
     else:
         form = TweetForm()
@@ -46,11 +100,15 @@ def tweet_create(request):
 
 @login_required
 def tweet_edit(request, tweet_id):
-    tweet = get_object_or_404(Tweet, id=tweet_id, user=request.user)
+    tweet = get_object_or_404(Tweet.objects.for_id(tweet_id), id=tweet_id, user=request.user)
     if request.method == "POST":
         form = TweetForm(request.POST, request.FILES, instance=tweet)
         if form.is_valid():
-            form.save()
+            with transactions(tweet._state.db):
+                invalidate_tweet(tweet)
+                form.save()
+                stage_photo(tweet, form.cleaned_data['photo'])
+                tweet_saved(tweet)
             return redirect('tweet_list')
     else:
         form = TweetForm(instance=tweet)
@@ -59,9 +117,11 @@ def tweet_edit(request, tweet_id):
 
 @login_required
 def tweet_delete(request, tweet_id):
-    tweet = get_object_or_404(Tweet, pk=tweet_id, user=request.user)
+    tweet = get_object_or_404(Tweet.objects.for_id(tweet_id), pk=tweet_id, user=request.user)
     if request.method == 'POST':
-        tweet.delete()
+        with transaction.atomic():
+            tweet_deleted(tweet)
+            tweet.delete()
         return redirect('tweet_list')
     return render(request, 'tweet_confirm_delete.html', {'tweet': tweet})
 
@@ -73,8 +133,7 @@ def register(request):
             user = form.save(commit=False)
             user.set_password(form.cleaned_data['password1'])
             user.save()
-            UserProfile.objects.get_or_create(user=user)
-            auth_login(request, user)
+            auth_login(request, user, backend=settings.AUTHENTICATION_BACKENDS[0])
             return redirect('tweet_list')
     else:
         form = Userregistrationform()
@@ -93,24 +152,27 @@ class AuthStatusView(APIView):
 
     def get(self, request):
         if request.user.is_authenticated:
-            UserProfile.objects.get_or_create(user=request.user)
             return Response({
                 'is_authenticated': True,
-                'user': UserMiniSerializer(request.user).data,
+                'user': get_identity(request.user.id),
             })
         return Response({'is_authenticated': False})
 
 
 class APILoginView(APIView):
     permission_classes = [permissions.AllowAny]
+    # Checked before authenticate(), so refused attempts never reach the password hasher.
+    throttle_classes = THROTTLE_CLASSES
+    throttle_scope = 'login'
+    throttle_username_field = 'username'
 
     def post(self, request):
-        username = request.data.get('username', '')
-        password = request.data.get('password', '')
+        data = request.data if isinstance(request.data, dict) else {}
+        username = data.get('username', '')
+        password = data.get('password', '')
         user = authenticate(request, username=username, password=password)
         if user:
             auth_login(request, user)
-            UserProfile.objects.get_or_create(user=user)
             return Response({
                 'success': True,
                 'user': UserMiniSerializer(user).data,
@@ -126,12 +188,14 @@ class APILogoutView(APIView):
 
 class APIRegisterView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = THROTTLE_CLASSES
+    throttle_scope = 'register'
 
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            auth_login(request, user)
+            auth_login(request, user, backend=settings.AUTHENTICATION_BACKENDS[0])
             return Response({
                 'success': True,
                 'user': UserMiniSerializer(user).data,
@@ -141,111 +205,300 @@ class APIRegisterView(APIView):
 
 # --- Tweets ---
 
-class TweetListCreateView(APIView):
+def paginated_tweets_response(request, paginator, tweets):
+    """Serialize a page of tweets, or answer 304 if the client's copy is current."""
+    context = tweet_context(request, tweets)
+    etag = tweets_etag(tweets, context['viewer_state'],
+                       paginator.get_next_cursor(), paginator.get_prev_cursor())
+    response = not_modified(request, etag, per_viewer=True)
+    if response is None:
+        response = paginator.get_paginated_response(serialize_tweets(tweets, context))
+        patch_validators(response, etag, per_viewer=True)
+    return response
+
+
+class TweetListCreateView(ProfilingMixin, APIView):
+    throttle_classes = THROTTLE_CLASSES
+    throttle_scope = 'tweet_create'
+
     def get_permissions(self):
         if self.request.method == 'GET':
             return [permissions.AllowAny()]
         return [permissions.IsAuthenticated()]
 
     def get(self, request):
-        tweets = Tweet.objects.select_related('user').all()
-        serializer = TweetSerializer(tweets, many=True, context={'request': request})
-        return Response(serializer.data)
+        if request.query_params.get('feed') == 'for_you':
+            paginator = RankedFeedPagination()
+            tweets = paginator.paginate_ranked(request)
+        else:
+            paginator = TweetCursorPagination()
+            tweets = paginator.paginate_queryset(Tweet.objects.all(), request, view=self)
+        return paginated_tweets_response(request, paginator, tweets)
 
     def post(self, request):
         serializer = TweetCreateSerializer(data=request.data)
         if serializer.is_valid():
-            tweet = serializer.save(user=request.user)
-            out = TweetSerializer(tweet, context={'request': request})
-            return Response(out.data, status=status.HTTP_201_CREATED)
+            with transaction.atomic():
+                tweet = serializer.save(user=request.user)
+                tweet_saved(tweet, created=True)
+            return Response(serialize_tweet(tweet, tweet_context(request, [tweet])),
+                            status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class TweetDetailView(APIView):
+class HomeTimelineView(ProfilingMixin, APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        paginator = HomeTimelinePagination()
+        tweets = paginator.paginate_timeline(request.user, request)
+        return paginated_tweets_response(request, paginator, tweets)
+
+
+class TweetDetailView(ProfilingMixin, APIView):
     permission_classes = [permissions.AllowAny]
 
     def get_object(self, pk):
-        return get_object_or_404(Tweet, pk=pk)
+        return get_object_or_404(Tweet.objects.for_id(pk), pk=pk)
 
     def get(self, request, pk):
         tweet = self.get_object(pk)
-        serializer = TweetSerializer(tweet, context={'request': request})
-        return Response(serializer.data)
+        context = tweet_context(request, [tweet])
+        etag = tweets_etag([tweet], context['viewer_state'])
+        response = not_modified(request, etag, per_viewer=True)
+        if response is None:
+            response = Response(serialize_tweet(tweet, context))
+            patch_validators(response, etag, per_viewer=True)
+        return response
 
     def put(self, request, pk):
         tweet = self.get_object(pk)
-        if tweet.user != request.user:
+        if tweet.user_id != request.user.id:
             return Response({'error': 'Not allowed'}, status=status.HTTP_403_FORBIDDEN)
         serializer = TweetCreateSerializer(tweet, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
-            out = TweetSerializer(tweet, context={'request': request})
-            return Response(out.data)
+            with transactions(tweet._state.db):
+                invalidate_tweet(tweet)
+                serializer.save()
+                tweet_saved(tweet)
+            return Response(serialize_tweet(tweet, tweet_context(request, [tweet])))
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, pk):
         tweet = self.get_object(pk)
-        if tweet.user != request.user:
+        if tweet.user_id != request.user.id:
             return Response({'error': 'Not allowed'}, status=status.HTTP_403_FORBIDDEN)
-        tweet.delete()
+        with transaction.atomic():
+            tweet_deleted(tweet)
+            tweet.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class TrendsView(ProfilingMixin, APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        return Response({'trends': trending()})
+
+
+class SearchView(ProfilingMixin, APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        paginator = SearchPagination()
+        tweets = paginator.paginate_search(get_search_backend(), query, request)
+        return paginated_tweets_response(request, paginator, tweets)
+
+
+class TweetBatchView(ProfilingMixin, APIView):
+    """Several tweets by id in one request: ``?ids=1,2,3``."""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        ids = parse_id_list(request.query_params.get('ids', ''))
+        if ids is None:
+            return Response({'error': 'ids must be a comma-separated list of tweet ids'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > batch_max():
+            return Response({'error': f'At most {batch_max()} ids per request'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        by_id = Tweet.objects.in_bulk(ids)
+        tweets = [by_id[pk] for pk in ids if pk in by_id]
+        missing = [pk for pk in ids if pk not in by_id]
+        context = tweet_context(request, tweets)
+        etag = tweets_etag(tweets, context['viewer_state'], missing)
+        response = not_modified(request, etag, per_viewer=True)
+        if response is None:
+            response = Response({'results': serialize_tweets(tweets, context), 'missing': missing})
+            patch_validators(response, etag, per_viewer=True)
+        return response
+
+
 # --- Likes ---
 
-class LikeToggleView(APIView):
+class LikeToggleView(ProfilingMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = THROTTLE_CLASSES
+    throttle_scope = 'like'
 
     def post(self, request, pk):
-        tweet = get_object_or_404(Tweet, pk=pk)
-        like, created = Like.objects.get_or_create(user=request.user, tweet=tweet)
-        if not created:
-            like.delete()
-            return Response({'liked': False, 'like_count': tweet.like_count})
-        # Create notification (don't notify self)
-        if tweet.user != request.user:
-            Notification.objects.create(
-                recipient=tweet.user,
-                actor=request.user,
-                verb='like',
-                tweet=tweet,
-            )
-        return Response({'liked': True, 'like_count': tweet.like_count})
+        tweet = get_object_or_404(Tweet.objects.for_id(pk), pk=pk)
+        likes = Like.objects.for_user(request.user.id)
+        # The like, the tweet and the profile may be on three databases; each
+        # gets its own transaction (see sharding.transactions).
+        with transactions(*likes.aliases(), tweet._state.db):
+            like, created = likes.get_or_create(user=request.user, tweet=tweet)
+            if not created:
+                # Only the request whose delete removed the row undoes the counts.
+                deleted, _ = Like.objects.for_id(like.pk).filter(pk=like.pk).delete()
+                if deleted:
+                    Tweet.objects.for_id(tweet.pk).filter(pk=tweet.pk).update(like_count=F('like_count') - 1)
+                    stats.adjust_counts(request.user.id, likes_count=-1)
+                    retract('like', tweet.user_id, request.user.id, tweet.id)
+            else:
+                Tweet.objects.for_id(tweet.pk).filter(pk=tweet.pk).update(like_count=F('like_count') + 1)
+                stats.adjust_counts(request.user.id, likes_count=1)
+                notify('like', tweet.user_id, request.user.id, tweet.id)
+        tweet.refresh_from_db(fields=['like_count'])
+        return Response({'liked': created, 'like_count': tweet.like_count})
+
+
+class LikeBatchView(ProfilingMixin, APIView):
+    """
+    Apply ``{"operations": [{"tweet": 1, "action": "like" | "unlike"}, ...]}``.
+
+    Unlike the toggle, each operation sets a state, so replaying a batch is
+    harmless. Counters move only for the inserts and deletes that took
+    effect, so concurrent batches racing on the same like count it once;
+    they are then updated in bulk, in one transaction per database. Results
+    come back per operation, in request order.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = THROTTLE_CLASSES
+    throttle_scope = 'like'
+
+    def get_operations(self, request):
+        # A JSON body may be a list or a scalar, which has no .get().
+        return request.data.get('operations') if isinstance(request.data, dict) else None
+
+    def throttle_cost(self, request):
+        operations = self.get_operations(request)
+        return len(operations) if isinstance(operations, list) and operations else 1
+
+    def insert_like(self, likes, user, tweet_id):
+        """Insert one like; False if a concurrent request got there first."""
+        try:
+            with transaction.atomic(using=shard_for_user(user.id)):
+                likes.create(user=user, tweet_id=tweet_id)
+        except IntegrityError:
+            return False
+        return True
+
+    def delete_like(self, like_id):
+        deleted, _ = Like.objects.for_id(like_id).filter(pk=like_id).delete()
+        return deleted > 0
+
+    def post(self, request):
+        operations = self.get_operations(request)
+        if not isinstance(operations, list) or not operations:
+            return Response({'error': 'operations must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(operations) > batch_max():
+            return Response({'error': f'At most {batch_max()} operations per request'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        wanted = {}
+        for op in operations:
+            if (not isinstance(op, dict) or op.get('action') not in ('like', 'unlike')
+                    or not isinstance(op.get('tweet'), int) or isinstance(op.get('tweet'), bool)):
+                return Response({'error': 'Each operation needs an integer tweet and action like or unlike'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            wanted[op['tweet']] = op['action'] == 'like'  # the last operation on a tweet wins
+
+        user = request.user
+        # Tweets may be on any shard; one transaction per database.
+        with transactions(*shard_databases()):
+            found = Tweet.objects.only('id', 'user_id').in_bulk(list(wanted))
+            authors = {pk: tweet.user_id for pk, tweet in found.items()}
+            likes = Like.objects.for_user(user.id)
+            liked = {tweet_id: pk for shard in each_shard(likes.filter(user=user, tweet_id__in=authors))
+                     for pk, tweet_id in shard.values_list('id', 'tweet_id')}
+            to_like = [pk for pk in authors if wanted[pk] and pk not in liked
+                       and self.insert_like(likes, user, pk)]
+            to_unlike = [pk for pk in authors if not wanted[pk] and pk in liked
+                         and self.delete_like(liked[pk])]
+            if to_like:
+                Tweet.objects.filter(pk__in=to_like).update(like_count=F('like_count') + 1)
+            if to_unlike:
+                Tweet.objects.filter(pk__in=to_unlike).update(like_count=F('like_count') - 1)
+            stats.adjust_counts(user.id, likes_count=len(to_like) - len(to_unlike))
+            for pk in to_like:
+                notify('like', authors[pk], user.id, pk)
+            for pk in to_unlike:
+                retract('like', authors[pk], user.id, pk)
+        counts = {pk: tweet.like_count
+                  for pk, tweet in Tweet.objects.only('id', 'like_count').in_bulk(list(authors)).items()}
+
+        changed = set(to_like) | set(to_unlike)
+        results = []
+        for op in operations:
+            pk = op['tweet']
+            if pk not in counts:
+                results.append({'tweet': pk, 'error': 'Not found'})
+                continue
+            results.append({'tweet': pk, 'liked': wanted[pk], 'changed': pk in changed, 'like_count': counts[pk]})
+            changed.discard(pk)  # report a change once per tweet
+        return Response({'results': results})
 
 
 # --- Notifications ---
 
-class NotificationListView(APIView):
+class NotificationListView(ProfilingMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        notifs = request.user.notifications.all()[:50]
-        serializer = NotificationSerializer(notifs, many=True)
-        unread = request.user.notifications.filter(is_read=False).count()
-        return Response({'notifications': serializer.data, 'unread_count': unread})
+        notifs = scatter(Notification.objects.for_user(request.user.id).filter(recipient=request.user)
+                         .order_by('-created_at', '-id'), 50)
+        context = {
+            # Mentioned-in tweets may live on another shard, so no join.
+            'tweets': Tweet.objects.only('id', 'text').in_bulk([n.tweet_id for n in notifs if n.tweet_id]),
+            'identities': load_identities(n.actor_id for n in notifs),
+            'read_at': read_watermark(request.user.id),
+        }
+        with measure('serialize'):
+            data = NotificationSerializer(notifs, many=True, context=context).data
+        return Response({'notifications': data, 'unread_count': unread_count(request.user.id)})
 
     def post(self, request):
         """Mark all as read."""
-        request.user.notifications.filter(is_read=False).update(is_read=True)
+        mark_all_read(request.user.id)
         return Response({'success': True})
 
 
+class UnreadCountView(ProfilingMixin, APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({'unread_count': unread_count(request.user.id)})
+
+
 # --- User Profile ---
 
-class UserProfileView(APIView):
+class UserProfileView(ProfilingMixin, APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, username):
-        from django.contrib.auth.models import User as AuthUser
-        user = get_object_or_404(AuthUser, username=username)
-        profile, _ = UserProfile.objects.get_or_create(user=user)
-        serializer = UserProfileSerializer(profile)
-        return Response(serializer.data)
+        profile = get_object_or_404(UserProfile.objects.select_related('user'), user__username=username)
+        etag = make_etag(profile.id, profile.updated_at, profile.tweets_count, profile.likes_count,
+                         profile.followers_count, profile.following_count)
+        response = not_modified(request, etag)
+        if response is None:
+            response = patch_validators(Response(UserProfileSerializer(profile).data), etag)
+        return response
 
     def put(self, request, username):
         if not request.user.is_authenticated or request.user.username != username:
             return Response({'error': 'Not allowed'}, status=status.HTTP_403_FORBIDDEN)
-        profile, _ = UserProfile.objects.get_or_create(user=request.user)
+        profile = get_object_or_404(UserProfile.objects.select_related('user'), user=request.user)
         serializer = UserProfileSerializer(profile, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
@@ -253,19 +506,94 @@ class UserProfileView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserTweetsView(APIView):
+class FollowView(ProfilingMixin, APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, username):
+        from django.contrib.auth.models import User as AuthUser
+        followee = get_object_or_404(AuthUser, username=username)
+        if followee == request.user:
+            return Response({'error': 'You cannot follow yourself'}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            _, created = Follow.objects.get_or_create(follower=request.user, followee=followee)
+            if created:
+                stats.follow_changed(request.user.id, followee.id, 1)
+        if created:
+            notify('follow', followee.id, request.user.id)
+            enqueue(backfill_follow, request.user.id, followee.id)
+        return Response({'following': True})
+
+    def delete(self, request, username):
+        from django.contrib.auth.models import User as AuthUser
+        followee = get_object_or_404(AuthUser, username=username)
+        with transaction.atomic():
+            deleted, _ = Follow.objects.filter(follower=request.user, followee=followee).delete()
+            if deleted:
+                stats.follow_changed(request.user.id, followee.id, -1)
+        if deleted:
+            enqueue(purge_unfollow, request.user.id, followee.id)
+            retract('follow', followee.id, request.user.id)
+        return Response({'following': False})
+
+
+class UserTweetsView(ProfilingMixin, APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, username):
         from django.contrib.auth.models import User as AuthUser
         user = get_object_or_404(AuthUser, username=username)
-        tweets = Tweet.objects.filter(user=user)
-        serializer = TweetSerializer(tweets, many=True, context={'request': request})
-        return Response(serializer.data)
+        paginator = TweetCursorPagination()
+        tweets = paginator.paginate_queryset(
+            Tweet.objects.for_user(user.id).filter(user=user), request, view=self)
+        return paginated_tweets_response(request, paginator, tweets)
 
-from django.http import JsonResponse
+
+# --- Health ---
+
+class HealthView(APIView):
+    """Database liveness for load balancers; staff also get connection and pool stats."""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        databases = dbhealth.report(details=request.user.is_staff)
+        healthy = all(entry['ok'] for entry in databases.values())
+        body = {'status': 'ok' if healthy else 'unavailable', 'databases': databases}
+        if request.user.is_staff:
+            body['throttle_rejections'] = rejected_counts()
+        return Response(body, status=status.HTTP_200_OK if healthy else status.HTTP_503_SERVICE_UNAVAILABLE)
+
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import ensure_csrf_cookie
 
+from .realtime import get_broker, user_channel, format_event
+
 @ensure_csrf_cookie
 def csrf_init(request):
-    return JsonResponse({"detail": "CSRF cookie set"})
\ No newline at end of file
+    return JsonResponse({"detail": "CSRF cookie set"})
+
+
+# --- Streaming (ASGI only) ---
+
+async def event_stream(request):
+    """Server-Sent Events: new tweet ids and the viewer's notification deltas."""
+    user = await request.auser()
+    channels = ['tweets']
+    if user.is_authenticated:
+        channels.append(user_channel(user.id))
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    heartbeat = getattr(settings, 'REALTIME_HEARTBEAT', 15)
+
+    async def stream():
+        subscription = get_broker().subscribe(channels, last_event_id)
+        try:
+            yield 'retry: 3000\n\n'
+            while not subscription.overflowed:
+                event = await subscription.get(heartbeat)
+                yield format_event(event) if event else ': keepalive\n\n'
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
\ No newline at end of file
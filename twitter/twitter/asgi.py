@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'twitter.settings')
 
 application = get_asgi_application()
+
+# Sharded deployments: lease this process's Snowflake worker id now, so a
+# clash stops it here rather than failing its first insert.
+from tweet.sharding import claim_worker_id  # noqa: E402
+
+claim_worker_id()